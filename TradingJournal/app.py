@@ -1,26 +1,31 @@
 import calendar
+import functools
 import base64
 import io
 import json
 import mimetypes
 import hashlib
+import hmac
 import os
+import shutil
 import sqlite3
+import string
+import sys
 import time
-import traceback
+import types
 import uuid
 import urllib.error
 import urllib.request
 import urllib.parse
 import xml.etree.ElementTree as ET
+from collections.abc import Mapping
 from dataclasses import dataclass
 from datetime import date, datetime, timedelta
 from pathlib import Path
 from zoneinfo import ZoneInfo
 
+import numpy as np
 import pandas as pd
-import plotly.express as px
-import plotly.graph_objects as go
 import streamlit as st
 import streamlit.components.v1 as components
 from streamlit_paste_button import paste_image_button
@@ -42,6 +47,12 @@ LOGO_CANDIDATES = [
     Path("assets/logo.jpg"),
 ]
 PAGE_ORDER = {"landing": 0, "login": 1, "register": 2, "app": 3}
+PAGE_TRANSITIONS = {
+    (from_page, to_page): "forward" if PAGE_ORDER[to_page] > PAGE_ORDER[from_page] else "backward"
+    for from_page in PAGE_ORDER
+    for to_page in PAGE_ORDER
+    if from_page != to_page
+}
 DEBUG_DEFAULT = os.getenv("APP_DEBUG", "0").strip() == "1"
 THEME_PRESETS = {
     "Midnight": {
@@ -63,10 +74,135 @@ THEME_PRESETS = {
         "accent_color": "#8a6bff",
     },
 }
+DEFAULT_THEME = types.MappingProxyType({**THEME_PRESETS["Midnight"], "theme_name": "Midnight"})
+THEME_STATE_KEYS = {
+    "theme_name": "theme_name",
+    "bg_color": "theme_bg_color",
+    "surface_color": "theme_surface_color",
+    "text_color": "theme_text_color",
+    "accent_color": "theme_accent_color",
+}
+PNL_CLASSES = {1: "pnl-pos", -1: "pnl-neg", 0: "pnl-flat"}
+WEEK_CLASSES = {1: "week-pos", -1: "week-neg", 0: "week-flat"}
+CALENDAR_HEADER_HTML = "".join(
+    f'<div class="pnl-head{" pnl-head-last" if header == "P&L" else ""}">{header}</div>'
+    for header in ["Mon", "Tue", "Wed", "Thu", "Fri", "Sat", "Sun", "P&L"]
+)
+CALENDAR_EMPTY_DAY_HTML = '<div class="day-cell"></div>'
+CALENDAR_DAY_TEMPLATE = '<div class="day-cell"><div class="day-num">%d</div></div>'
+CALENDAR_DAY_PNL_TEMPLATE = (
+    '<div class="day-cell"><div class="day-num">%d</div>'
+    '<div class="day-pnl %s">$%s</div>'
+    '<div class="day-trades">%d trade%s</div>'
+    "</div>"
+)
+CALENDAR_WEEK_TEMPLATE = (
+    '<div class="week-cell %s"><div class="week-body">'
+    '<div class="week-label">WEEK</div>'
+    '<div class="week-pnl %s">$%s</div>'
+    '<div class="week-trades">%d trade%s</div>'
+    "</div></div>"
+)
 NEWS_SCRAPER_DEFAULT = os.getenv("ENABLE_NEWS_SCRAPER", "1").strip() == "1"
 FOREX_FACTORY_WEEKLY_XML_URL = "https://nfs.faireconomy.media/ff_calendar_thisweek.xml"
 SUPABASE_URL = os.getenv("SUPABASE_URL", "").strip().rstrip("/")
 SUPABASE_SERVICE_KEY = os.getenv("SUPABASE_SERVICE_KEY", "").strip()
+CREATE_TRADES_TABLE_SQL = """
+    CREATE TABLE IF NOT EXISTS {table} (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        user_id INTEGER,
+        trade_date TEXT NOT NULL,
+        account_id INTEGER NOT NULL,
+        symbol TEXT NOT NULL,
+        side TEXT NOT NULL,
+        quantity REAL NOT NULL,
+        entry_price REAL NOT NULL,
+        exit_price REAL NOT NULL,
+        fees REAL NOT NULL DEFAULT 0,
+        gross_pnl REAL NOT NULL,
+        net_pnl REAL NOT NULL,
+        tags TEXT,
+        notes TEXT,
+        image_path TEXT,
+        created_at TEXT NOT NULL,
+        FOREIGN KEY (user_id) REFERENCES users(id),
+        FOREIGN KEY (account_id) REFERENCES accounts(id) ON DELETE CASCADE
+    )
+"""
+CREATE_ACCOUNT_CASHFLOWS_TABLE_SQL = """
+    CREATE TABLE IF NOT EXISTS {table} (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        user_id INTEGER NOT NULL,
+        account_id INTEGER NOT NULL,
+        flow_date TEXT NOT NULL,
+        flow_type TEXT NOT NULL,
+        amount REAL NOT NULL,
+        note TEXT,
+        created_at TEXT NOT NULL,
+        FOREIGN KEY (user_id) REFERENCES users(id),
+        FOREIGN KEY (account_id) REFERENCES accounts(id) ON DELETE CASCADE
+    )
+"""
+ACCOUNT_CASCADE_TABLES = {
+    "trades": CREATE_TRADES_TABLE_SQL,
+    "account_cashflows": CREATE_ACCOUNT_CASHFLOWS_TABLE_SQL,
+}
+INSERT_TRADE_SQL = """
+    INSERT INTO trades (
+        id, user_id, trade_date, account_id, symbol, side, quantity, entry_price, exit_price,
+        fees, gross_pnl, net_pnl, tags, notes, image_path, created_at
+    ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+"""
+INSERT_CASHFLOW_SQL = """
+    INSERT INTO account_cashflows (user_id, account_id, flow_date, flow_type, amount, note, created_at)
+    VALUES (?, ?, ?, ?, ?, ?, ?)
+"""
+UPSERT_USER_THEME_SQL = """
+    INSERT INTO user_themes (user_id, theme_name, bg_color, surface_color, text_color, accent_color, updated_at)
+    VALUES (?, ?, ?, ?, ?, ?, ?)
+    ON CONFLICT(user_id) DO UPDATE SET
+        theme_name=excluded.theme_name,
+        bg_color=excluded.bg_color,
+        surface_color=excluded.surface_color,
+        text_color=excluded.text_color,
+        accent_color=excluded.accent_color,
+        updated_at=excluded.updated_at
+"""
+UPSERT_THEME_PROFILE_SQL = """
+    INSERT INTO user_theme_profiles
+        (user_id, profile_name, bg_color, surface_color, text_color, accent_color, updated_at)
+    VALUES (?, ?, ?, ?, ?, ?, ?)
+    ON CONFLICT(user_id, profile_name) DO UPDATE SET
+        bg_color=excluded.bg_color,
+        surface_color=excluded.surface_color,
+        text_color=excluded.text_color,
+        accent_color=excluded.accent_color,
+        updated_at=excluded.updated_at
+"""
+UPSERT_PNL_TARGETS_SQL = """
+    INSERT INTO user_targets (
+        user_id,
+        target_pnl,
+        target_daily_pnl,
+        target_weekly_pnl,
+        target_monthly_pnl,
+        updated_at
+    )
+    VALUES (?, ?, ?, ?, ?, ?)
+    ON CONFLICT(user_id) DO UPDATE SET
+        target_pnl = excluded.target_pnl,
+        target_daily_pnl = excluded.target_daily_pnl,
+        target_weekly_pnl = excluded.target_weekly_pnl,
+        target_monthly_pnl = excluded.target_monthly_pnl,
+        updated_at = excluded.updated_at
+"""
+CURRENT_SCHEMA_VERSION = 3
+PASSWORD_HASH_PREFIX = "scrypt$"
+SCRYPT_N = 2**15
+SCRYPT_R = 8
+SCRYPT_P = 1
+SCRYPT_MAXMEM = 64 * 1024 * 1024
+DUMMY_PASSWORD_SALT = uuid.uuid4().hex
 
 
 @dataclass
@@ -85,17 +221,61 @@ class TradeInput:
     manual_net_pnl: float | None = None
 
 
-def get_conn() -> sqlite3.Connection:
+def now_iso() -> str:
+    return datetime.now().isoformat(timespec="seconds")
+
+
+def apply_connection_pragmas(conn: sqlite3.Connection) -> None:
+    conn.execute("PRAGMA journal_mode = WAL")
+    conn.execute("PRAGMA synchronous = NORMAL")
+    conn.execute("PRAGMA temp_store = MEMORY")
+    conn.execute("PRAGMA cache_size = -20000")
+    conn.execute("PRAGMA mmap_size = 268435456")
+    conn.execute("PRAGMA busy_timeout = 5000")
+    conn.execute("PRAGMA foreign_keys = ON")
+
+
+def open_db_connection() -> sqlite3.Connection:
     conn = sqlite3.connect(DB_PATH, check_same_thread=False)
     conn.row_factory = sqlite3.Row
+    apply_connection_pragmas(conn)
+    return conn
+
+
+@st.cache_resource(show_spinner=False)
+def prepare_database() -> None:
+    conn = open_db_connection()
+    try:
+        init_db(conn)
+        ensure_admin_user(conn)
+    finally:
+        conn.close()
+
+
+def get_conn() -> sqlite3.Connection:
+    # One connection per browser session: sessions run on separate threads, so
+    # sharing a single connection would interleave their transactions.
+    prepare_database()
+    conn = st.session_state.get("db_conn")
+    if conn is None:
+        conn = open_db_connection()
+        st.session_state["db_conn"] = conn
     return conn
 
 
-def ensure_column(conn: sqlite3.Connection, table: str, column_name: str, definition: str) -> None:
-    existing_cols = [row["name"] for row in conn.execute(f"PRAGMA table_info({table})").fetchall()]
-    if column_name not in existing_cols:
+def ensure_column(
+    conn: sqlite3.Connection,
+    table: str,
+    column_name: str,
+    definition: str,
+    table_columns: dict[str, set[str]],
+) -> None:
+    if table not in table_columns:
+        table_columns[table] = {row["name"] for row in conn.execute(f"PRAGMA table_info({table})").fetchall()}
+    if column_name not in table_columns[table]:
         conn.execute(f"ALTER TABLE {table} ADD COLUMN {definition}")
         conn.commit()
+        table_columns[table].add(column_name)
 
 
 def migrate_accounts_table_if_needed(conn: sqlite3.Connection) -> None:
@@ -136,11 +316,63 @@ def migrate_accounts_table_if_needed(conn: sqlite3.Connection) -> None:
     )
     conn.execute("DROP TABLE accounts")
     conn.execute("ALTER TABLE accounts_new RENAME TO accounts")
+    conn.commit()
     conn.execute("PRAGMA foreign_keys = ON")
+
+
+def has_account_cascade(conn: sqlite3.Connection, table: str) -> bool:
+    return any(
+        row["table"] == "accounts" and row["on_delete"] == "CASCADE"
+        for row in conn.execute(f"PRAGMA foreign_key_list({table})").fetchall()
+    )
+
+
+def migrate_account_cascade_if_needed(conn: sqlite3.Connection) -> None:
+    for table, create_sql in ACCOUNT_CASCADE_TABLES.items():
+        if has_account_cascade(conn, table):
+            continue
+
+        old_columns = {row["name"] for row in conn.execute(f"PRAGMA table_info({table})").fetchall()}
+        conn.execute("PRAGMA foreign_keys = OFF")
+        conn.execute(f"DROP TABLE IF EXISTS {table}_new")
+        conn.execute(create_sql.format(table=f"{table}_new"))
+        columns = ", ".join(
+            row["name"]
+            for row in conn.execute(f"PRAGMA table_info({table}_new)").fetchall()
+            if row["name"] in old_columns
+        )
+        conn.execute(f"INSERT INTO {table}_new ({columns}) SELECT {columns} FROM {table}")
+        conn.execute(f"DROP TABLE {table}")
+        conn.execute(f"ALTER TABLE {table}_new RENAME TO {table}")
+        conn.commit()
+        conn.execute("PRAGMA foreign_keys = ON")
+
+
+def ensure_indexes(conn: sqlite3.Connection) -> None:
+    indexes = {
+        "idx_trades_user_date": "CREATE INDEX IF NOT EXISTS idx_trades_user_date ON trades(user_id, trade_date DESC, id DESC)",
+        "idx_trades_user_account": "CREATE INDEX IF NOT EXISTS idx_trades_user_account ON trades(user_id, account_id)",
+        "idx_cashflows_user_account": (
+            "CREATE INDEX IF NOT EXISTS idx_cashflows_user_account ON account_cashflows(user_id, account_id)"
+        ),
+    }
+    existing = {
+        str(row["name"]) for row in conn.execute("SELECT name FROM sqlite_master WHERE type='index'").fetchall()
+    }
+    missing = [sql for name, sql in indexes.items() if name not in existing]
+    if not missing:
+        return
+    for sql in missing:
+        conn.execute(sql)
+    conn.execute("ANALYZE")
     conn.commit()
 
 
 def init_db(conn: sqlite3.Connection) -> None:
+    schema_version = conn.execute("PRAGMA user_version").fetchone()[0]
+    if schema_version == CURRENT_SCHEMA_VERSION:
+        return
+
     conn.execute(
         """
         CREATE TABLE IF NOT EXISTS users (
@@ -171,46 +403,8 @@ def init_db(conn: sqlite3.Connection) -> None:
         """
     )
 
-    conn.execute(
-        """
-        CREATE TABLE IF NOT EXISTS trades (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            user_id INTEGER,
-            trade_date TEXT NOT NULL,
-            account_id INTEGER NOT NULL,
-            symbol TEXT NOT NULL,
-            side TEXT NOT NULL,
-            quantity REAL NOT NULL,
-            entry_price REAL NOT NULL,
-            exit_price REAL NOT NULL,
-            fees REAL NOT NULL DEFAULT 0,
-            gross_pnl REAL NOT NULL,
-            net_pnl REAL NOT NULL,
-            tags TEXT,
-            notes TEXT,
-            image_path TEXT,
-            created_at TEXT NOT NULL,
-            FOREIGN KEY (user_id) REFERENCES users(id),
-            FOREIGN KEY (account_id) REFERENCES accounts(id)
-        )
-        """
-    )
-    conn.execute(
-        """
-        CREATE TABLE IF NOT EXISTS account_cashflows (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            user_id INTEGER NOT NULL,
-            account_id INTEGER NOT NULL,
-            flow_date TEXT NOT NULL,
-            flow_type TEXT NOT NULL,
-            amount REAL NOT NULL,
-            note TEXT,
-            created_at TEXT NOT NULL,
-            FOREIGN KEY (user_id) REFERENCES users(id),
-            FOREIGN KEY (account_id) REFERENCES accounts(id)
-        )
-        """
-    )
+    conn.execute(CREATE_TRADES_TABLE_SQL.format(table="trades"))
+    conn.execute(CREATE_ACCOUNT_CASHFLOWS_TABLE_SQL.format(table="account_cashflows"))
     conn.execute(
         """
         CREATE TABLE IF NOT EXISTS remember_tokens (
@@ -268,17 +462,42 @@ def init_db(conn: sqlite3.Connection) -> None:
     )
     conn.commit()
 
-    ensure_column(conn, "accounts", "user_id", "user_id INTEGER")
-    ensure_column(conn, "trades", "user_id", "user_id INTEGER")
-    ensure_column(conn, "trades", "image_path", "image_path TEXT")
-    ensure_column(conn, "users", "is_admin", "is_admin INTEGER NOT NULL DEFAULT 0")
-    ensure_column(conn, "user_targets", "target_daily_pnl", "target_daily_pnl REAL NOT NULL DEFAULT 0")
-    ensure_column(conn, "user_targets", "target_weekly_pnl", "target_weekly_pnl REAL NOT NULL DEFAULT 0")
-    ensure_column(conn, "user_targets", "target_monthly_pnl", "target_monthly_pnl REAL NOT NULL DEFAULT 0")
+    table_columns: dict[str, set[str]] = {}
+    ensure_column(conn, "accounts", "user_id", "user_id INTEGER", table_columns)
+    ensure_column(conn, "trades", "user_id", "user_id INTEGER", table_columns)
+    ensure_column(conn, "trades", "image_path", "image_path TEXT", table_columns)
+    ensure_column(conn, "users", "is_admin", "is_admin INTEGER NOT NULL DEFAULT 0", table_columns)
+    ensure_column(
+        conn, "user_targets", "target_daily_pnl", "target_daily_pnl REAL NOT NULL DEFAULT 0", table_columns
+    )
+    ensure_column(
+        conn, "user_targets", "target_weekly_pnl", "target_weekly_pnl REAL NOT NULL DEFAULT 0", table_columns
+    )
+    ensure_column(
+        conn, "user_targets", "target_monthly_pnl", "target_monthly_pnl REAL NOT NULL DEFAULT 0", table_columns
+    )
     migrate_accounts_table_if_needed(conn)
+    migrate_account_cascade_if_needed(conn)
+    ensure_indexes(conn)
+    if all(has_account_cascade(conn, table) for table in ACCOUNT_CASCADE_TABLES):
+        conn.execute(f"PRAGMA user_version = {CURRENT_SCHEMA_VERSION}")
+    conn.commit()
 
 
 def hash_password(password: str, salt: str) -> str:
+    digest = hashlib.scrypt(
+        password.encode("utf-8"),
+        salt=bytes.fromhex(salt),
+        n=SCRYPT_N,
+        r=SCRYPT_R,
+        p=SCRYPT_P,
+        maxmem=SCRYPT_MAXMEM,
+        dklen=32,
+    ).hex()
+    return f"{PASSWORD_HASH_PREFIX}{digest}"
+
+
+def hash_password_legacy(password: str, salt: str) -> str:
     return hashlib.pbkdf2_hmac(
         "sha256",
         password.encode("utf-8"),
@@ -287,7 +506,21 @@ def hash_password(password: str, salt: str) -> str:
     ).hex()
 
 
-def create_user(conn: sqlite3.Connection, username: str, email: str, password: str) -> tuple[bool, str]:
+def is_legacy_password_hash(stored_hash: str) -> bool:
+    return not stored_hash.startswith(PASSWORD_HASH_PREFIX)
+
+
+def verify_password(password: str, salt: str, stored_hash: str) -> bool:
+    if is_legacy_password_hash(stored_hash):
+        candidate_hash = hash_password_legacy(password, salt)
+    else:
+        candidate_hash = hash_password(password, salt)
+    return hmac.compare_digest(candidate_hash, stored_hash)
+
+
+def create_user(
+    conn: sqlite3.Connection, username: str, email: str, password: str, now: str | None = None
+) -> tuple[bool, str]:
     username = username.strip()
     email = email.strip()
     if len(username) < 3:
@@ -297,7 +530,7 @@ def create_user(conn: sqlite3.Connection, username: str, email: str, password: s
 
     salt = hashlib.sha256(f"{username}{time.time()}".encode("utf-8")).hexdigest()[:32]
     password_hash = hash_password(password, salt)
-    now = datetime.now().isoformat(timespec="seconds")
+    now = now or now_iso()
 
     try:
         cursor = conn.execute(
@@ -330,11 +563,22 @@ def authenticate_user(conn: sqlite3.Connection, username: str, password: str) ->
         (username.strip(),),
     ).fetchone()
     if not row:
+        hash_password(password, DUMMY_PASSWORD_SALT)
         return False, "Invalid username or password.", None
 
-    candidate_hash = hash_password(password, row["password_salt"])
-    if candidate_hash != row["password_hash"]:
+    stored_hash = str(row["password_hash"])
+    if not verify_password(password, row["password_salt"], stored_hash):
+        if is_legacy_password_hash(stored_hash):
+            # Pay the same scrypt hash as the unknown-user branch, so a failed
+            # legacy check is not the fastest way to be turned away.
+            hash_password(password, DUMMY_PASSWORD_SALT)
         return False, "Invalid username or password.", None
+    if is_legacy_password_hash(stored_hash):
+        conn.execute(
+            "UPDATE users SET password_hash = ? WHERE id = ?",
+            (hash_password(password, row["password_salt"]), int(row["id"])),
+        )
+        conn.commit()
     return True, "Login successful.", int(row["id"])
 
 
@@ -366,7 +610,7 @@ def ensure_admin_user(conn: sqlite3.Connection) -> None:
 
     salt = hashlib.sha256(f"{username}{time.time()}".encode("utf-8")).hexdigest()[:32]
     password_hash = hash_password(password, salt)
-    now = datetime.now().isoformat(timespec="seconds")
+    now = now_iso()
     cursor = conn.execute(
         """
         INSERT INTO users (username, email, password_hash, password_salt, is_admin, created_at)
@@ -386,13 +630,13 @@ def ensure_admin_user(conn: sqlite3.Connection) -> None:
 
 
 def list_users_for_admin(conn: sqlite3.Connection) -> pd.DataFrame:
-    return pd.read_sql_query(
+    return query_dataframe(
+        conn,
         """
         SELECT id, username, email, is_admin, created_at
         FROM users
         ORDER BY created_at DESC
         """,
-        conn,
     )
 
 
@@ -458,9 +702,17 @@ def admin_change_username(conn: sqlite3.Connection, target_user_id: int, new_use
     return True, "Username updated."
 
 
+def hash_remember_token(raw_token: str) -> str:
+    return hashlib.blake2b(raw_token.encode("utf-8"), digest_size=16).hexdigest()
+
+
+def remember_token_hash_candidates(raw_token: str) -> tuple[str, str]:
+    return hash_remember_token(raw_token), hashlib.sha256(raw_token.encode("utf-8")).hexdigest()
+
+
 def create_remember_token(conn: sqlite3.Connection, user_id: int, days_valid: int = 30) -> str:
     raw = f"{uuid.uuid4().hex}{uuid.uuid4().hex}"
-    token_hash = hashlib.sha256(raw.encode("utf-8")).hexdigest()
+    token_hash = hash_remember_token(raw)
     now = datetime.now()
     expires = now + timedelta(days=days_valid)
     conn.execute(
@@ -477,22 +729,22 @@ def create_remember_token(conn: sqlite3.Connection, user_id: int, days_valid: in
 def authenticate_with_remember_token(
     conn: sqlite3.Connection, raw_token: str
 ) -> tuple[bool, int | None, str | None]:
-    token_hash = hashlib.sha256(raw_token.encode("utf-8")).hexdigest()
+    token_hashes = remember_token_hash_candidates(raw_token)
     row = conn.execute(
         """
         SELECT rt.user_id, rt.expires_at, u.username
         FROM remember_tokens rt
         JOIN users u ON u.id = rt.user_id
-        WHERE rt.token_hash = ?
+        WHERE rt.token_hash IN (?, ?)
         """,
-        (token_hash,),
+        token_hashes,
     ).fetchone()
     if not row:
         return False, None, None
 
     expires_at = datetime.fromisoformat(row["expires_at"])
     if expires_at < datetime.now():
-        conn.execute("DELETE FROM remember_tokens WHERE token_hash = ?", (token_hash,))
+        conn.execute("DELETE FROM remember_tokens WHERE token_hash IN (?, ?)", token_hashes)
         conn.commit()
         return False, None, None
 
@@ -502,20 +754,28 @@ def authenticate_with_remember_token(
 def revoke_remember_token(conn: sqlite3.Connection, raw_token: str | None) -> None:
     if not raw_token:
         return
-    token_hash = hashlib.sha256(raw_token.encode("utf-8")).hexdigest()
-    conn.execute("DELETE FROM remember_tokens WHERE token_hash = ?", (token_hash,))
+    conn.execute(
+        "DELETE FROM remember_tokens WHERE token_hash IN (?, ?)",
+        remember_token_hash_candidates(raw_token),
+    )
     conn.commit()
 
 
+def query_dataframe(conn: sqlite3.Connection, query: str, params: tuple = ()) -> pd.DataFrame:
+    cursor = conn.execute(query, params)
+    columns = [col[0] for col in cursor.description]
+    return pd.DataFrame.from_records([tuple(row) for row in cursor.fetchall()], columns=columns)
+
+
 def get_accounts(conn: sqlite3.Connection, user_id: int) -> pd.DataFrame:
-    return pd.read_sql_query(
-        "SELECT * FROM accounts WHERE user_id = ? ORDER BY name",
+    return query_dataframe(
         conn,
-        params=(user_id,),
+        "SELECT * FROM accounts WHERE user_id = ? ORDER BY name",
+        (user_id,),
     )
 
 
-def get_user_theme(conn: sqlite3.Connection, user_id: int) -> dict:
+def get_user_theme(conn: sqlite3.Connection, user_id: int) -> Mapping[str, str]:
     row = conn.execute(
         """
         SELECT theme_name, bg_color, surface_color, text_color, accent_color
@@ -525,9 +785,7 @@ def get_user_theme(conn: sqlite3.Connection, user_id: int) -> dict:
         (user_id,),
     ).fetchone()
     if not row:
-        default = THEME_PRESETS["Midnight"].copy()
-        default["theme_name"] = "Midnight"
-        return default
+        return DEFAULT_THEME
     return {
         "theme_name": str(row["theme_name"]),
         "bg_color": str(row["bg_color"]),
@@ -537,20 +795,10 @@ def get_user_theme(conn: sqlite3.Connection, user_id: int) -> dict:
     }
 
 
-def save_user_theme(conn: sqlite3.Connection, user_id: int, theme: dict) -> None:
-    now = datetime.now().isoformat(timespec="seconds")
+def save_user_theme(conn: sqlite3.Connection, user_id: int, theme: dict, now: str | None = None) -> None:
+    now = now or now_iso()
     conn.execute(
-        """
-        INSERT INTO user_themes (user_id, theme_name, bg_color, surface_color, text_color, accent_color, updated_at)
-        VALUES (?, ?, ?, ?, ?, ?, ?)
-        ON CONFLICT(user_id) DO UPDATE SET
-            theme_name=excluded.theme_name,
-            bg_color=excluded.bg_color,
-            surface_color=excluded.surface_color,
-            text_color=excluded.text_color,
-            accent_color=excluded.accent_color,
-            updated_at=excluded.updated_at
-        """,
+        UPSERT_USER_THEME_SQL,
         (
             user_id,
             theme["theme_name"],
@@ -564,20 +812,12 @@ def save_user_theme(conn: sqlite3.Connection, user_id: int, theme: dict) -> None
     conn.commit()
 
 
-def save_user_theme_profile(conn: sqlite3.Connection, user_id: int, profile_name: str, theme: dict) -> None:
-    now = datetime.now().isoformat(timespec="seconds")
+def save_user_theme_profile(
+    conn: sqlite3.Connection, user_id: int, profile_name: str, theme: dict, now: str | None = None
+) -> None:
+    now = now or now_iso()
     conn.execute(
-        """
-        INSERT INTO user_theme_profiles
-            (user_id, profile_name, bg_color, surface_color, text_color, accent_color, updated_at)
-        VALUES (?, ?, ?, ?, ?, ?, ?)
-        ON CONFLICT(user_id, profile_name) DO UPDATE SET
-            bg_color=excluded.bg_color,
-            surface_color=excluded.surface_color,
-            text_color=excluded.text_color,
-            accent_color=excluded.accent_color,
-            updated_at=excluded.updated_at
-        """,
+        UPSERT_THEME_PROFILE_SQL,
         (
             user_id,
             profile_name.strip(),
@@ -621,26 +861,11 @@ def save_user_pnl_targets(
     daily: float,
     weekly: float,
     monthly: float,
+    now: str | None = None,
 ) -> None:
-    now = datetime.now().isoformat(timespec="seconds")
+    now = now or now_iso()
     conn.execute(
-        """
-        INSERT INTO user_targets (
-            user_id,
-            target_pnl,
-            target_daily_pnl,
-            target_weekly_pnl,
-            target_monthly_pnl,
-            updated_at
-        )
-        VALUES (?, ?, ?, ?, ?, ?)
-        ON CONFLICT(user_id) DO UPDATE SET
-            target_pnl = excluded.target_pnl,
-            target_daily_pnl = excluded.target_daily_pnl,
-            target_weekly_pnl = excluded.target_weekly_pnl,
-            target_monthly_pnl = excluded.target_monthly_pnl,
-            updated_at = excluded.updated_at
-        """,
+        UPSERT_PNL_TARGETS_SQL,
         (
             user_id,
             float(monthly),
@@ -666,15 +891,28 @@ def list_user_theme_profiles(conn: sqlite3.Connection, user_id: int) -> list[str
     return [str(row["profile_name"]) for row in rows]
 
 
-def load_user_theme_profile(conn: sqlite3.Connection, user_id: int, profile_name: str) -> dict | None:
+def apply_user_theme_profile(
+    conn: sqlite3.Connection, user_id: int, profile_name: str, now: str | None = None
+) -> dict | None:
+    now = now or now_iso()
     row = conn.execute(
         """
-        SELECT profile_name, bg_color, surface_color, text_color, accent_color
+        INSERT INTO user_themes (user_id, theme_name, bg_color, surface_color, text_color, accent_color, updated_at)
+        SELECT user_id, 'Custom', bg_color, surface_color, text_color, accent_color, ?
         FROM user_theme_profiles
         WHERE user_id = ? AND profile_name = ?
+        ON CONFLICT(user_id) DO UPDATE SET
+            theme_name=excluded.theme_name,
+            bg_color=excluded.bg_color,
+            surface_color=excluded.surface_color,
+            text_color=excluded.text_color,
+            accent_color=excluded.accent_color,
+            updated_at=excluded.updated_at
+        RETURNING bg_color, surface_color, text_color, accent_color
         """,
-        (user_id, profile_name),
+        (now, user_id, profile_name),
     ).fetchone()
+    conn.commit()
     if not row:
         return None
     return {
@@ -686,13 +924,9 @@ def load_user_theme_profile(conn: sqlite3.Connection, user_id: int, profile_name
     }
 
 
-def apply_user_theme(theme: dict) -> None:
-    bg = theme["bg_color"]
-    surface = theme["surface_color"]
-    text = theme["text_color"]
-    accent = theme["accent_color"]
-    st.markdown(
-        f"""
+@functools.lru_cache(maxsize=32)
+def build_theme_css(bg: str, surface: str, text: str, accent: str) -> str:
+    return f"""
         <style>
         [data-testid="stAppViewContainer"] {{
             background:
@@ -808,35 +1042,137 @@ def apply_user_theme(theme: dict) -> None:
             box-shadow: 0 8px 16px rgba(0, 0, 0, 0.25);
         }}
         </style>
-        """,
+        """
+
+
+def apply_user_theme(theme: dict) -> None:
+    st.markdown(
+        build_theme_css(theme["bg_color"], theme["surface_color"], theme["text_color"], theme["accent_color"]),
         unsafe_allow_html=True,
     )
 
 
-def get_trades(conn: sqlite3.Connection, user_id: int) -> pd.DataFrame:
-    query = """
+def get_trades(conn: sqlite3.Connection, user_id: int, account_id: int | None = None) -> pd.DataFrame:
+    account_clause = "" if account_id is None else "AND t.account_id = ?"
+    query = f"""
         SELECT
             t.*,
             a.name AS account_name
         FROM trades t
         JOIN accounts a ON a.id = t.account_id
-        WHERE t.user_id = ?
+        WHERE t.user_id = ? {account_clause}
         ORDER BY t.trade_date DESC, t.id DESC
     """
-    return pd.read_sql_query(query, conn, params=(user_id,))
+    params = (user_id,) if account_id is None else (user_id, account_id)
+    return query_dataframe(conn, query, params)
 
 
-def get_cashflows(conn: sqlite3.Connection, user_id: int) -> pd.DataFrame:
-    query = """
+def get_cashflows(conn: sqlite3.Connection, user_id: int, account_id: int | None = None) -> pd.DataFrame:
+    account_clause = "" if account_id is None else "AND c.account_id = ?"
+    query = f"""
         SELECT
             c.*,
             a.name AS account_name
         FROM account_cashflows c
         JOIN accounts a ON a.id = c.account_id
-        WHERE c.user_id = ?
+        WHERE c.user_id = ? {account_clause}
         ORDER BY c.flow_date DESC, c.id DESC
     """
-    return pd.read_sql_query(query, conn, params=(user_id,))
+    params = (user_id,) if account_id is None else (user_id, account_id)
+    return query_dataframe(conn, query, params)
+
+
+# The cached loaders are keyed on user_id only; every writer calls
+# clear_user_data_cache() and the TTL bounds staleness from other processes.
+@st.cache_data(ttl=300, show_spinner=False)
+def get_accounts_cached(_conn: sqlite3.Connection, user_id: int) -> pd.DataFrame:
+    accounts_df = get_accounts(_conn, user_id)
+    accounts_df["id"] = accounts_df["id"].astype("int64", copy=False)
+    return accounts_df
+
+
+@st.cache_data(ttl=300, show_spinner=False)
+def get_trades_cached(
+    _conn: sqlite3.Connection, user_id: int, account_id: int | None = None
+) -> pd.DataFrame:
+    trades_df = get_trades(_conn, user_id, account_id)
+    trades_df["symbol_upper"] = trades_df["symbol"].fillna("").str.upper()
+    trades_df["tags_lower"] = trades_df["tags"].fillna("").str.lower()
+    trades_df["has_image"] = trades_df["image_path"].fillna("").str.strip().ne("")
+    trade_dates = pd.to_datetime(trades_df["trade_date"])
+    trades_df["trade_timestamp"] = trade_dates.dt.normalize()
+    trades_df["trade_year_month"] = trade_dates.dt.year * 100 + trade_dates.dt.month
+    trades_df["trade_day"] = trade_dates.dt.day
+    for column in ("account_name", "side", "symbol"):
+        trades_df[column] = trades_df[column].astype("category")
+    return trades_df
+
+
+@st.cache_data(ttl=300, show_spinner=False)
+def get_cashflows_cached(
+    _conn: sqlite3.Connection, user_id: int, account_id: int | None = None
+) -> pd.DataFrame:
+    return get_cashflows(_conn, user_id, account_id)
+
+
+@st.cache_data(ttl=300, show_spinner=False)
+def get_account_view_cached(_conn: sqlite3.Connection, user_id: int) -> pd.DataFrame:
+    trades_df = get_trades_cached(_conn, user_id)
+    cashflows_df = get_cashflows_cached(_conn, user_id)
+    account_view = get_accounts_cached(_conn, user_id).rename(columns={"id": "account_id"})
+    account_view["trade_net_pnl"] = (
+        account_view["account_id"].map(trades_df.groupby("account_id")["net_pnl"].sum()).fillna(0.0)
+    )
+    account_view["net_transfers"] = (
+        account_view["account_id"].map(cashflows_df.groupby("account_id")["amount"].sum()).fillna(0.0)
+    )
+    account_view["est_balance"] = account_view["trade_net_pnl"] + account_view["net_transfers"]
+    return account_view
+
+
+@st.cache_data(ttl=300, show_spinner=False)
+def get_account_metrics_cached(
+    _conn: sqlite3.Connection, user_id: int, account_id: int | None = None
+) -> dict:
+    return account_metrics(
+        get_trades_cached(_conn, user_id, account_id),
+        get_cashflows_cached(_conn, user_id, account_id),
+    )
+
+
+@st.cache_data(ttl=300, show_spinner=False, max_entries=32)
+def build_equity_curve_cached(
+    _trades_df: pd.DataFrame, user_id: int, filter_key: tuple[str, str, str]
+) -> pd.DataFrame:
+    chart_df = _trades_df[["trade_timestamp", "net_pnl"]].sort_values("trade_timestamp", kind="stable")
+    return pd.DataFrame(
+        {
+            "trade_date": chart_df["trade_timestamp"],
+            "cumulative_net": chart_df["net_pnl"].cumsum(),
+        }
+    )
+
+
+def clear_user_data_cache() -> None:
+    get_accounts_cached.clear()
+    get_trades_cached.clear()
+    get_cashflows_cached.clear()
+    get_account_view_cached.clear()
+    get_account_metrics_cached.clear()
+    build_equity_curve_cached.clear()
+
+
+def trade_option_labels(trades_df: pd.DataFrame) -> list[str]:
+    return (
+        "#"
+        + trades_df["id"].astype(int).astype(str)
+        + " | "
+        + trades_df["trade_date"].astype(str)
+        + " | "
+        + trades_df["symbol"].astype(str)
+        + " | "
+        + trades_df["account_name"].astype(str)
+    ).tolist()
 
 
 def calculate_pnl(
@@ -850,6 +1186,18 @@ def calculate_pnl(
     return gross, net
 
 
+def calculate_pnl_vec(
+    sides: np.ndarray,
+    quantities: np.ndarray,
+    entry_prices: np.ndarray,
+    exit_prices: np.ndarray,
+    fees: np.ndarray,
+) -> tuple[np.ndarray, np.ndarray]:
+    sign = np.where(sides == "Long", 1.0, -1.0)
+    gross = sign * (exit_prices - entry_prices) * quantities
+    return gross, gross - fees
+
+
 def to_float_or_none(value) -> float | None:
     if value is None:
         return None
@@ -1029,7 +1377,7 @@ def build_user_snapshot(conn: sqlite3.Connection, user_id: int, username: str) -
 
     return {
         "version": 1,
-        "saved_at": datetime.now().isoformat(timespec="seconds"),
+        "saved_at": now_iso(),
         "username": username,
         "accounts": accounts_df.to_dict(orient="records"),
         "trades": trades_df.to_dict(orient="records"),
@@ -1042,7 +1390,7 @@ def build_user_snapshot(conn: sqlite3.Connection, user_id: int, username: str) -
 
 def save_snapshot_to_cloud(conn: sqlite3.Connection, user_id: int, username: str) -> tuple[bool, str]:
     snapshot = build_user_snapshot(conn, user_id, username)
-    now = datetime.now().isoformat(timespec="seconds")
+    now = now_iso()
     payload = [
         {
             "username": username,
@@ -1088,14 +1436,18 @@ def restore_snapshot_into_user(conn: sqlite3.Connection, user_id: int, snapshot:
         targets = snapshot.get("targets", {}) or {}
         theme = snapshot.get("theme")
         theme_profiles = snapshot.get("theme_profiles", []) or []
+        now = now_iso()
+        today = date.today().isoformat()
 
+        # Take the write lock up front so no other session can insert trades
+        # between picking free ids below and committing.
+        conn.execute("BEGIN IMMEDIATE")
         conn.execute("DELETE FROM trades WHERE user_id = ?", (user_id,))
         conn.execute("DELETE FROM account_cashflows WHERE user_id = ?", (user_id,))
         conn.execute("DELETE FROM accounts WHERE user_id = ?", (user_id,))
         conn.execute("DELETE FROM user_targets WHERE user_id = ?", (user_id,))
         conn.execute("DELETE FROM user_themes WHERE user_id = ?", (user_id,))
         conn.execute("DELETE FROM user_theme_profiles WHERE user_id = ?", (user_id,))
-        conn.commit()
 
         account_id_map: dict[int, int] = {}
         for row in accounts:
@@ -1111,7 +1463,7 @@ def restore_snapshot_into_user(conn: sqlite3.Connection, user_id: int, snapshot:
                     str(row.get("broker", "")),
                     str(row.get("account_type", "")),
                     str(row.get("description", "")),
-                    str(row.get("created_at", datetime.now().isoformat(timespec="seconds"))),
+                    str(row.get("created_at", now)),
                 ),
             )
             new_id = int(cursor.lastrowid)
@@ -1119,7 +1471,6 @@ def restore_snapshot_into_user(conn: sqlite3.Connection, user_id: int, snapshot:
                 account_id_map[old_id] = new_id
 
         if not account_id_map:
-            now = datetime.now().isoformat(timespec="seconds")
             cursor = conn.execute(
                 """
                 INSERT INTO accounts (user_id, name, broker, account_type, description, created_at)
@@ -1131,41 +1482,30 @@ def restore_snapshot_into_user(conn: sqlite3.Connection, user_id: int, snapshot:
 
         default_account_id = next(iter(account_id_map.values()))
 
-        for row in cashflows:
-            source_account_id = int(row.get("account_id", 0) or 0)
-            mapped_account_id = account_id_map.get(source_account_id, default_account_id)
-            conn.execute(
-                """
-                INSERT INTO account_cashflows (user_id, account_id, flow_date, flow_type, amount, note, created_at)
-                VALUES (?, ?, ?, ?, ?, ?, ?)
-                """,
+        conn.executemany(
+            INSERT_CASHFLOW_SQL,
+            [
                 (
                     user_id,
-                    mapped_account_id,
-                    str(row.get("flow_date", date.today().isoformat())),
+                    account_id_map.get(int(row.get("account_id", 0) or 0), default_account_id),
+                    str(row.get("flow_date", today)),
                     str(row.get("flow_type", "Deposit")),
                     float(row.get("amount", 0.0) or 0.0),
                     str(row.get("note", "")),
-                    str(row.get("created_at", datetime.now().isoformat(timespec="seconds"))),
-                ),
-            )
+                    str(row.get("created_at", now)),
+                )
+                for row in cashflows
+            ],
+        )
 
-        for row in trades:
-            source_account_id = int(row.get("account_id", 0) or 0)
-            mapped_account_id = account_id_map.get(source_account_id, default_account_id)
-            next_trade_id = get_next_available_trade_id(conn)
-            conn.execute(
-                """
-                INSERT INTO trades (
-                    id, user_id, trade_date, account_id, symbol, side, quantity, entry_price, exit_price,
-                    fees, gross_pnl, net_pnl, tags, notes, image_path, created_at
-                ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-                """,
+        conn.executemany(
+            INSERT_TRADE_SQL,
+            [
                 (
-                    next_trade_id,
+                    trade_id,
                     user_id,
-                    str(row.get("trade_date", date.today().isoformat())),
-                    mapped_account_id,
+                    str(row.get("trade_date", today)),
+                    account_id_map.get(int(row.get("account_id", 0) or 0), default_account_id),
                     str(row.get("symbol", "")).upper().strip(),
                     str(row.get("side", "Long")),
                     float(row.get("quantity", 0.0) or 0.0),
@@ -1177,33 +1517,54 @@ def restore_snapshot_into_user(conn: sqlite3.Connection, user_id: int, snapshot:
                     str(row.get("tags", "")),
                     str(row.get("notes", "")),
                     str(row.get("image_path", "")),
-                    str(row.get("created_at", datetime.now().isoformat(timespec="seconds"))),
-                ),
-            )
+                    str(row.get("created_at", now)),
+                )
+                for trade_id, row in zip(get_available_trade_ids(conn, len(trades)), trades)
+            ],
+        )
 
-        save_user_pnl_targets(
-            conn,
-            user_id,
-            float(targets.get("daily", 0.0) or 0.0),
-            float(targets.get("weekly", 0.0) or 0.0),
-            float(targets.get("monthly", 0.0) or 0.0),
+        monthly_target = float(targets.get("monthly", 0.0) or 0.0)
+        conn.execute(
+            UPSERT_PNL_TARGETS_SQL,
+            (
+                user_id,
+                monthly_target,
+                float(targets.get("daily", 0.0) or 0.0),
+                float(targets.get("weekly", 0.0) or 0.0),
+                monthly_target,
+                now,
+            ),
         )
         if isinstance(theme, dict):
-            save_user_theme(conn, user_id, theme)
-        for profile in theme_profiles:
-            save_user_theme_profile(
-                conn,
-                user_id,
-                str(profile.get("profile_name", "Profile")),
-                {
-                    "theme_name": "Custom",
-                    "bg_color": str(profile.get("bg_color", "#0f1117")),
-                    "surface_color": str(profile.get("surface_color", "#1f2333")),
-                    "text_color": str(profile.get("text_color", "#f6f8ff")),
-                    "accent_color": str(profile.get("accent_color", "#5b7cfa")),
-                },
+            conn.execute(
+                UPSERT_USER_THEME_SQL,
+                (
+                    user_id,
+                    theme["theme_name"],
+                    theme["bg_color"],
+                    theme["surface_color"],
+                    theme["text_color"],
+                    theme["accent_color"],
+                    now,
+                ),
             )
+        conn.executemany(
+            UPSERT_THEME_PROFILE_SQL,
+            [
+                (
+                    user_id,
+                    str(profile.get("profile_name", "Profile")).strip(),
+                    str(profile.get("bg_color", "#0f1117")),
+                    str(profile.get("surface_color", "#1f2333")),
+                    str(profile.get("text_color", "#f6f8ff")),
+                    str(profile.get("accent_color", "#5b7cfa")),
+                    now,
+                )
+                for profile in theme_profiles
+            ],
+        )
         conn.commit()
+        clear_user_data_cache()
         return True, "Cloud backup restored."
     except Exception as exc:
         conn.rollback()
@@ -1709,15 +2070,24 @@ def save_trade_image(uploaded_file, user_id: int, pasted_image_bytes: bytes | No
     else:
         suffix = Path(uploaded_file.name).suffix.lower() or ".png"
 
-    filename = f"{datetime.now().strftime('%Y%m%d_%H%M%S')}_{uuid.uuid4().hex[:10]}{suffix}"
-    destination = user_dir / filename
-    if pasted_image_bytes is not None:
-        destination.write_bytes(pasted_image_bytes)
-    else:
-        destination.write_bytes(uploaded_file.getvalue())
+    data = pasted_image_bytes if pasted_image_bytes is not None else uploaded_file.getvalue()
+    destination = user_dir / f"{hashlib.blake2b(data, digest_size=8).hexdigest()}{suffix}"
+    if not destination.exists():
+        destination.write_bytes(data)
     return str(destination)
 
 
+def remove_image_if_unreferenced(conn: sqlite3.Connection, image_path: str) -> None:
+    if not image_path:
+        return
+    still_used = conn.execute("SELECT 1 FROM trades WHERE image_path = ? LIMIT 1", (image_path,)).fetchone()
+    if still_used:
+        return
+    image_file = resolve_image_path(image_path)
+    if image_file.exists():
+        image_file.unlink(missing_ok=True)
+
+
 def resolve_image_path(raw_path: str) -> Path:
     path = Path(str(raw_path or "").strip())
     if not str(path):
@@ -1730,53 +2100,130 @@ def resolve_image_path(raw_path: str) -> Path:
 
 
 def get_next_available_trade_id(conn: sqlite3.Connection) -> int:
-    ids = [int(row["id"]) for row in conn.execute("SELECT id FROM trades ORDER BY id").fetchall()]
-    expected = 1
-    for current in ids:
-        if current == expected:
-            expected += 1
-        elif current > expected:
-            break
-    return expected
+    row = conn.execute(
+        """
+        SELECT COALESCE(
+            (SELECT 1 WHERE NOT EXISTS (SELECT 1 FROM trades WHERE id = 1)),
+            (
+                SELECT MIN(t1.id + 1)
+                FROM trades t1
+                LEFT JOIN trades t2 ON t2.id = t1.id + 1
+                WHERE t2.id IS NULL
+            )
+        ) AS next_id
+        """
+    ).fetchone()
+    return int(row["next_id"])
 
 
-def save_trade(conn: sqlite3.Connection, user_id: int, trade: TradeInput) -> None:
+def resolve_trade_pnl(trade: TradeInput) -> tuple[float, float]:
     if trade.manual_net_pnl is not None:
         net = float(trade.manual_net_pnl)
-        gross = net + float(trade.fees)
-    else:
-        gross, net = calculate_pnl(
-            trade.side, trade.quantity, trade.entry_price, trade.exit_price, trade.fees
-        )
-    now = datetime.now().isoformat(timespec="seconds")
-    next_trade_id = get_next_available_trade_id(conn)
-    conn.execute(
+        return net + float(trade.fees), net
+    return calculate_pnl(trade.side, trade.quantity, trade.entry_price, trade.exit_price, trade.fees)
+
+
+def trade_insert_values(
+    trade_id: int, user_id: int, trade: TradeInput, gross: float, net: float, now: str
+) -> tuple:
+    return (
+        trade_id,
+        user_id,
+        trade.trade_date,
+        trade.account_id,
+        trade.symbol.upper().strip(),
+        trade.side,
+        trade.quantity,
+        trade.entry_price,
+        trade.exit_price,
+        trade.fees,
+        gross,
+        net,
+        trade.tags.strip(),
+        trade.notes.strip(),
+        trade.image_path.strip(),
+        now,
+    )
+
+
+def get_available_trade_ids(conn: sqlite3.Connection, count: int) -> list[int]:
+    if count <= 0:
+        return []
+    # Each row is a free range [gap_start, gap_stop); the trailing range past
+    # MAX(id) has no stop, and every range holds at least one id.
+    gaps = conn.execute(
         """
-        INSERT INTO trades (
-            id, user_id, trade_date, account_id, symbol, side, quantity, entry_price, exit_price,
-            fees, gross_pnl, net_pnl, tags, notes, image_path, created_at
-        ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+        SELECT 1 AS gap_start, (SELECT MIN(id) FROM trades) AS gap_stop
+        WHERE NOT EXISTS (SELECT 1 FROM trades WHERE id = 1)
+        UNION ALL
+        SELECT * FROM (
+            SELECT
+                t1.id + 1 AS gap_start,
+                (SELECT MIN(t3.id) FROM trades t3 WHERE t3.id > t1.id) AS gap_stop
+            FROM trades t1
+            LEFT JOIN trades t2 ON t2.id = t1.id + 1
+            WHERE t2.id IS NULL
+            ORDER BY t1.id
+        )
+        LIMIT ?
         """,
-        (
-            next_trade_id,
-            user_id,
-            trade.trade_date,
-            trade.account_id,
-            trade.symbol.upper().strip(),
-            trade.side,
-            trade.quantity,
-            trade.entry_price,
-            trade.exit_price,
-            trade.fees,
-            gross,
-            net,
-            trade.tags.strip(),
-            trade.notes.strip(),
-            trade.image_path.strip(),
-            now,
-        ),
+        (count,),
+    ).fetchall()
+    available: list[int] = []
+    for row in gaps:
+        remaining = count - len(available)
+        gap_start = int(row["gap_start"])
+        gap_stop = gap_start + remaining
+        if row["gap_stop"] is not None:
+            gap_stop = min(int(row["gap_stop"]), gap_stop)
+        available.extend(range(gap_start, gap_stop))
+        if len(available) >= count:
+            break
+    return available
+
+
+def save_trade(conn: sqlite3.Connection, user_id: int, trade: TradeInput, now: str | None = None) -> None:
+    gross, net = resolve_trade_pnl(trade)
+    now = now or now_iso()
+    with conn:
+        conn.execute("BEGIN IMMEDIATE")
+        next_trade_id = get_next_available_trade_id(conn)
+        conn.execute(INSERT_TRADE_SQL, trade_insert_values(next_trade_id, user_id, trade, gross, net, now))
+    clear_user_data_cache()
+
+
+def save_trades_bulk(
+    conn: sqlite3.Connection, user_id: int, trades: list[TradeInput], now: str | None = None
+) -> int:
+    if not trades:
+        return 0
+    now = now or now_iso()
+    fees = np.array([trade.fees for trade in trades], dtype=np.float64)
+    gross, net = calculate_pnl_vec(
+        np.array([trade.side for trade in trades], dtype=object),
+        np.array([trade.quantity for trade in trades], dtype=np.float64),
+        np.array([trade.entry_price for trade in trades], dtype=np.float64),
+        np.array([trade.exit_price for trade in trades], dtype=np.float64),
+        fees,
     )
-    conn.commit()
+    manual_net = np.array(
+        [np.nan if trade.manual_net_pnl is None else trade.manual_net_pnl for trade in trades], dtype=np.float64
+    )
+    has_manual = ~np.isnan(manual_net)
+    net = np.where(has_manual, manual_net, net)
+    gross = np.where(has_manual, manual_net + fees, gross)
+    with conn:
+        # Hold the write lock from picking free ids until the commit, so another
+        # session cannot claim the same ids in between.
+        conn.execute("BEGIN IMMEDIATE")
+        trade_ids = get_available_trade_ids(conn, len(trades))
+        rows = [
+            trade_insert_values(trade_id, user_id, trade, trade_gross, trade_net, now)
+            for trade_id, trade, trade_gross, trade_net in zip(trade_ids, trades, gross.tolist(), net.tolist())
+        ]
+        conn.executemany(INSERT_TRADE_SQL, rows)
+    clear_user_data_cache()
+    return len(rows)
 
 
 def update_trade(
@@ -1813,16 +2260,8 @@ def update_trade(
     final_image_path = old_image_path
     if new_image_path.strip():
         final_image_path = new_image_path.strip()
-        if old_image_path and old_image_path != final_image_path:
-            old_file = resolve_image_path(old_image_path)
-            if old_file.exists():
-                old_file.unlink(missing_ok=True)
     elif clear_image:
         final_image_path = ""
-        if old_image_path:
-            old_file = resolve_image_path(old_image_path)
-            if old_file.exists():
-                old_file.unlink(missing_ok=True)
 
     result = conn.execute(
         """
@@ -1851,6 +2290,9 @@ def update_trade(
         ),
     )
     conn.commit()
+    clear_user_data_cache()
+    if old_image_path != final_image_path:
+        remove_image_if_unreferenced(conn, old_image_path)
     return result.rowcount > 0
 
 
@@ -1861,8 +2303,9 @@ def add_account(
     broker: str,
     account_type: str,
     description: str,
+    now: str | None = None,
 ) -> None:
-    now = datetime.now().isoformat(timespec="seconds")
+    now = now or now_iso()
     conn.execute(
         """
         INSERT INTO accounts (user_id, name, broker, account_type, description, created_at)
@@ -1871,21 +2314,19 @@ def add_account(
         (user_id, name.strip(), broker.strip(), account_type.strip(), description.strip(), now),
     )
     conn.commit()
+    clear_user_data_cache()
 
 
 def delete_trade(conn: sqlite3.Connection, trade_id: int, user_id: int) -> bool:
     row = conn.execute(
-        "SELECT image_path FROM trades WHERE id = ? AND user_id = ?",
+        "DELETE FROM trades WHERE id = ? AND user_id = ? RETURNING image_path",
         (trade_id, user_id),
     ).fetchone()
-    result = conn.execute("DELETE FROM trades WHERE id = ? AND user_id = ?", (trade_id, user_id))
     conn.commit()
-    deleted = result.rowcount > 0
+    clear_user_data_cache()
     if row and row["image_path"]:
-        image_file = resolve_image_path(str(row["image_path"]))
-        if image_file.exists():
-            image_file.unlink(missing_ok=True)
-    return deleted
+        remove_image_if_unreferenced(conn, str(row["image_path"]))
+    return row is not None
 
 
 def add_cashflow(
@@ -1896,27 +2337,34 @@ def add_cashflow(
     flow_type: str,
     amount: float,
     note: str,
+    now: str | None = None,
 ) -> None:
-    now = datetime.now().isoformat(timespec="seconds")
+    now = now or now_iso()
     signed_amount = amount if flow_type == "Deposit" else -amount
     conn.execute(
-        """
-        INSERT INTO account_cashflows (user_id, account_id, flow_date, flow_type, amount, note, created_at)
-        VALUES (?, ?, ?, ?, ?, ?, ?)
-        """,
+        INSERT_CASHFLOW_SQL,
         (user_id, account_id, flow_date, flow_type, signed_amount, note.strip(), now),
     )
     conn.commit()
+    clear_user_data_cache()
 
 
 def delete_account(conn: sqlite3.Connection, user_id: int, account_id: int) -> bool:
-    conn.execute("DELETE FROM trades WHERE user_id = ? AND account_id = ?", (user_id, account_id))
-    conn.execute("DELETE FROM account_cashflows WHERE user_id = ? AND account_id = ?", (user_id, account_id))
     result = conn.execute("DELETE FROM accounts WHERE user_id = ? AND id = ?", (user_id, account_id))
     conn.commit()
+    clear_user_data_cache()
     return result.rowcount > 0
 
 
+def compute_win_streaks(net_pnl: np.ndarray) -> tuple[int, int]:
+    if net_pnl.size == 0:
+        return 0, 0
+    positions = np.arange(net_pnl.size)
+    last_non_win = np.maximum.accumulate(np.where(net_pnl > 0, -1, positions))
+    run_lengths = positions - last_non_win
+    return int(run_lengths[-1]), int(run_lengths.max())
+
+
 def account_metrics(trades_df: pd.DataFrame, cashflows_df: pd.DataFrame) -> dict:
     cash_total = float(cashflows_df["amount"].sum()) if not cashflows_df.empty else 0.0
     total_withdrawal = (
@@ -1937,30 +2385,21 @@ def account_metrics(trades_df: pd.DataFrame, cashflows_df: pd.DataFrame) -> dict
             "best_win_streak": 0,
         }
 
-    wins = int((trades_df["net_pnl"] > 0).sum())
-    losses = int((trades_df["net_pnl"] < 0).sum())
-    total = len(trades_df)
-    total_net = float(trades_df["net_pnl"].sum())
-
-    ordered = trades_df.copy()
-    ordered["trade_date"] = pd.to_datetime(ordered["trade_date"])
-    ordered = ordered.sort_values(["trade_date", "id"])
-
-    current_streak = 0
-    best_streak = 0
-    for pnl in ordered["net_pnl"].tolist():
-        if pnl > 0:
-            current_streak += 1
-            best_streak = max(best_streak, current_streak)
-        else:
-            current_streak = 0
+    # get_trades returns newest first, so reversing gives chronological order.
+    net_pnl = trades_df["net_pnl"].to_numpy(dtype=np.float64)
+    wins = int(np.count_nonzero(net_pnl > 0))
+    losses = int(np.count_nonzero(net_pnl < 0))
+    total = net_pnl.size
+    total_net = float(net_pnl.sum())
+
+    current_streak, best_streak = compute_win_streaks(net_pnl[::-1])
 
     return {
         "total_net": total_net,
         "wins": wins,
         "losses": losses,
         "win_rate": float((wins / total) * 100 if total else 0),
-        "avg_net": float(trades_df["net_pnl"].mean()),
+        "avg_net": float(net_pnl.mean()),
         "account_balance": total_net + cash_total,
         "total_withdrawal": total_withdrawal,
         "win_streak": current_streak,
@@ -1972,204 +2411,204 @@ def period_pnl_metrics(trades_df: pd.DataFrame) -> dict:
     if trades_df.empty:
         return {"daily": 0.0, "weekly": 0.0, "monthly": 0.0}
 
-    temp = trades_df.copy()
-    temp["trade_date"] = pd.to_datetime(temp["trade_date"]).dt.date
-    today = date.today()
+    trade_days = trades_df["trade_timestamp"]
+    net_pnl = trades_df["net_pnl"]
+    today = pd.Timestamp(date.today())
     week_start = today - timedelta(days=today.weekday())
     month_start = today.replace(day=1)
+    up_to_today = trade_days <= today
 
-    daily_pnl = float(temp[temp["trade_date"] == today]["net_pnl"].sum())
-    weekly_pnl = float(temp[(temp["trade_date"] >= week_start) & (temp["trade_date"] <= today)]["net_pnl"].sum())
-    monthly_pnl = float(temp[(temp["trade_date"] >= month_start) & (temp["trade_date"] <= today)]["net_pnl"].sum())
+    daily_pnl = float(net_pnl[trade_days == today].sum())
+    weekly_pnl = float(net_pnl[(trade_days >= week_start) & up_to_today].sum())
+    monthly_pnl = float(net_pnl[(trade_days >= month_start) & up_to_today].sum())
 
     return {"daily": daily_pnl, "weekly": weekly_pnl, "monthly": monthly_pnl}
 
 
-def render_pnl_calendar(trades_df: pd.DataFrame, month: int, year: int) -> None:
-    st.subheader("P&L Calendar")
-    temp = trades_df.copy()
-    if not temp.empty:
-        temp["trade_date"] = pd.to_datetime(temp["trade_date"]).dt.date
-        month_days = temp[
-            (pd.to_datetime(temp["trade_date"]).dt.month == month)
-            & (pd.to_datetime(temp["trade_date"]).dt.year == year)
-        ]
-        day_summary = (
-            month_days.groupby("trade_date", as_index=False)
-            .agg(net_pnl=("net_pnl", "sum"), trades=("id", "count"))
-            .sort_values("trade_date")
-        )
-        day_map = {
-            row["trade_date"].day: {"net_pnl": float(row["net_pnl"]), "trades": int(row["trades"])}
-            for _, row in day_summary.iterrows()
-        }
-    else:
-        day_map = {}
+CALENDAR_CSS = """
+<style>
+.pnl-wrap {
+    border: 1px solid #232733;
+    border-radius: 12px;
+    background: radial-gradient(circle at top left, #1b202d 0%, #121620 70%);
+    padding: 14px;
+}
+.pnl-grid {
+    display: grid;
+    grid-template-columns: repeat(8, minmax(90px, 1fr));
+    gap: 8px;
+}
+.pnl-head {
+    color: #9ba3b4;
+    font-size: 13px;
+    font-weight: 600;
+    letter-spacing: 0.4px;
+    padding: 4px 6px 8px 6px;
+}
+.pnl-head-last {
+    background: linear-gradient(90deg, #5536d6 0%, #7b4ef2 100%);
+    color: #f3edff;
+    border-radius: 8px;
+    text-align: center;
+}
+.day-cell, .week-cell {
+    border: 1px solid #2b313f;
+    border-radius: 10px;
+    min-height: 92px;
+    padding: 8px;
+    background: rgba(15, 18, 25, 0.7);
+}
+.day-num {
+    color: #eef3ff;
+    font-size: 17px;
+    font-weight: 700;
+}
+.day-pnl {
+    margin-top: 20px;
+    font-size: 15px;
+    font-weight: 700;
+}
+.day-trades {
+    margin-top: 3px;
+    color: #91a0b8;
+    font-size: 12px;
+}
+.pnl-pos { color: #2acc74; }
+.pnl-neg { color: #ef5350; }
+.pnl-flat { color: #7f8ca3; }
+.week-cell {
+    display: flex;
+    align-items: center;
+    justify-content: center;
+}
+.week-pos {
+    background: linear-gradient(180deg, rgba(30, 114, 69, 0.72) 0%, rgba(25, 82, 53, 0.85) 100%);
+    border-color: #226e49;
+}
+.week-neg {
+    background: linear-gradient(180deg, rgba(138, 39, 45, 0.75) 0%, rgba(97, 26, 30, 0.9) 100%);
+    border-color: #8d313b;
+}
+.week-flat {
+    background: rgba(35, 39, 49, 0.55);
+}
+.week-body {
+    text-align: center;
+}
+.week-label {
+    color: #b6bfce;
+    font-size: 11px;
+    font-weight: 700;
+    letter-spacing: 0.8px;
+}
+.week-pnl {
+    margin-top: 8px;
+    font-size: 30px;
+    font-weight: 800;
+    line-height: 1.05;
+}
+.week-trades {
+    margin-top: 10px;
+    color: #c3cad7;
+    font-size: 12px;
+    font-weight: 600;
+}
+</style>
+"""
+
 
+@st.cache_data(ttl=300, show_spinner=False)
+def build_calendar_html(year: int, month: int, day_items: tuple[tuple[int, float, int], ...]) -> str:
+    pnl_by_day = [0.0] * 32
+    trades_by_day = [0] * 32
+    for day, net_pnl, trades in day_items:
+        pnl_by_day[day] = net_pnl
+        trades_by_day[day] = trades
     weeks = calendar.monthcalendar(year, month)
 
-    st.markdown(
-        """
-        <style>
-        .pnl-wrap {
-            border: 1px solid #232733;
-            border-radius: 12px;
-            background: radial-gradient(circle at top left, #1b202d 0%, #121620 70%);
-            padding: 14px;
-        }
-        .pnl-grid {
-            display: grid;
-            grid-template-columns: repeat(8, minmax(90px, 1fr));
-            gap: 8px;
-        }
-        .pnl-head {
-            color: #9ba3b4;
-            font-size: 13px;
-            font-weight: 600;
-            letter-spacing: 0.4px;
-            padding: 4px 6px 8px 6px;
-        }
-        .pnl-head-last {
-            background: linear-gradient(90deg, #5536d6 0%, #7b4ef2 100%);
-            color: #f3edff;
-            border-radius: 8px;
-            text-align: center;
-        }
-        .day-cell, .week-cell {
-            border: 1px solid #2b313f;
-            border-radius: 10px;
-            min-height: 92px;
-            padding: 8px;
-            background: rgba(15, 18, 25, 0.7);
-        }
-        .day-num {
-            color: #eef3ff;
-            font-size: 17px;
-            font-weight: 700;
-        }
-        .day-pnl {
-            margin-top: 20px;
-            font-size: 15px;
-            font-weight: 700;
-        }
-        .day-trades {
-            margin-top: 3px;
-            color: #91a0b8;
-            font-size: 12px;
-        }
-        .pnl-pos { color: #2acc74; }
-        .pnl-neg { color: #ef5350; }
-        .pnl-flat { color: #7f8ca3; }
-        .week-cell {
-            display: flex;
-            align-items: center;
-            justify-content: center;
-        }
-        .week-pos {
-            background: linear-gradient(180deg, rgba(30, 114, 69, 0.72) 0%, rgba(25, 82, 53, 0.85) 100%);
-            border-color: #226e49;
-        }
-        .week-neg {
-            background: linear-gradient(180deg, rgba(138, 39, 45, 0.75) 0%, rgba(97, 26, 30, 0.9) 100%);
-            border-color: #8d313b;
-        }
-        .week-flat {
-            background: rgba(35, 39, 49, 0.55);
-        }
-        .week-body {
-            text-align: center;
-        }
-        .week-label {
-            color: #b6bfce;
-            font-size: 11px;
-            font-weight: 700;
-            letter-spacing: 0.8px;
-        }
-        .week-pnl {
-            margin-top: 8px;
-            font-size: 30px;
-            font-weight: 800;
-            line-height: 1.05;
-        }
-        .week-trades {
-            margin-top: 10px;
-            color: #c3cad7;
-            font-size: 12px;
-            font-weight: 600;
-        }
-        </style>
-        """,
-        unsafe_allow_html=True,
-    )
-
-    headers = ["Mon", "Tue", "Wed", "Thu", "Fri", "Sat", "Sun", "P&L"]
-    html_parts = ['<div class="pnl-wrap"><div class="pnl-grid">']
-
-    for i, h in enumerate(headers):
-        extra = " pnl-head-last" if i == len(headers) - 1 else ""
-        html_parts.append(f'<div class="pnl-head{extra}">{h}</div>')
+    html_parts = ['<div class="pnl-wrap"><div class="pnl-grid">', CALENDAR_HEADER_HTML]
 
     for week in weeks:
-        week_pnl = 0.0
-        week_trades = 0
+        week_pnl = sum(pnl_by_day[day] for day in week[:7])
+        week_trades = sum(trades_by_day[day] for day in week[:7])
         for day in week[:7]:
             if day == 0:
-                html_parts.append('<div class="day-cell"></div>')
+                html_parts.append(CALENDAR_EMPTY_DAY_HTML)
                 continue
 
-            day_data = day_map.get(day, {"net_pnl": 0.0, "trades": 0})
-            day_pnl = day_data["net_pnl"]
-            day_trades = day_data["trades"]
-            week_pnl += day_pnl
-            week_trades += day_trades
-
-            pnl_class = "pnl-flat"
-            if day_pnl > 0:
-                pnl_class = "pnl-pos"
-            elif day_pnl < 0:
-                pnl_class = "pnl-neg"
-
-            pnl_html = ""
-            if day_trades > 0:
-                pnl_html = (
-                    f'<div class="day-pnl {pnl_class}">${abs(day_pnl):,.2f}</div>'
-                    f'<div class="day-trades">{day_trades} trade{"s" if day_trades != 1 else ""}</div>'
-                )
-
-            html_parts.append(f'<div class="day-cell"><div class="day-num">{day}</div>{pnl_html}</div>')
+            day_trades = trades_by_day[day]
+            if day_trades == 0:
+                html_parts.append(CALENDAR_DAY_TEMPLATE % day)
+                continue
 
-        week_class = "week-flat"
-        week_pnl_class = "pnl-flat"
-        if week_pnl > 0:
-            week_class = "week-pos"
-            week_pnl_class = "pnl-pos"
-        elif week_pnl < 0:
-            week_class = "week-neg"
-            week_pnl_class = "pnl-neg"
+            day_pnl = pnl_by_day[day]
+            html_parts.append(
+                CALENDAR_DAY_PNL_TEMPLATE
+                % (
+                    day,
+                    PNL_CLASSES[(day_pnl > 0) - (day_pnl < 0)],
+                    format(abs(day_pnl), ",.2f"),
+                    day_trades,
+                    "" if day_trades == 1 else "s",
+                )
+            )
 
+        week_sign = (week_pnl > 0) - (week_pnl < 0)
         html_parts.append(
-            f"""
-            <div class="week-cell {week_class}">
-                <div class="week-body">
-                    <div class="week-label">WEEK</div>
-                    <div class="week-pnl {week_pnl_class}">${abs(week_pnl):,.2f}</div>
-                    <div class="week-trades">{week_trades} trade{"s" if week_trades != 1 else ""}</div>
-                </div>
-            </div>
-            """
+            CALENDAR_WEEK_TEMPLATE
+            % (
+                WEEK_CLASSES[week_sign],
+                PNL_CLASSES[week_sign],
+                format(abs(week_pnl), ",.2f"),
+                week_trades,
+                "" if week_trades == 1 else "s",
+            )
         )
 
     html_parts.append("</div></div>")
-    st.markdown("".join(html_parts), unsafe_allow_html=True)
+    return "".join(html_parts)
+
+
+def render_pnl_calendar(trades_df: pd.DataFrame, month: int, year: int) -> None:
+    st.subheader("P&L Calendar")
+    if not trades_df.empty:
+        in_month = trades_df["trade_year_month"].to_numpy() == year * 100 + month
+        day_summary = (
+            trades_df.loc[in_month, ["trade_day", "net_pnl", "id"]]
+            .groupby("trade_day", sort=True)
+            .agg(net_pnl=("net_pnl", "sum"), trades=("id", "count"))
+        )
+        day_items = tuple(
+            zip(
+                day_summary.index.tolist(),
+                day_summary["net_pnl"].tolist(),
+                day_summary["trades"].tolist(),
+            )
+        )
+    else:
+        day_items = ()
 
+    st.markdown(CALENDAR_CSS, unsafe_allow_html=True)
+    st.markdown(build_calendar_html(year, month, day_items), unsafe_allow_html=True)
 
+
+@st.cache_resource(show_spinner=False)
 def get_logo_path() -> Path | None:
+    entries_by_dir: dict[Path, set[str]] = {}
     for candidate in LOGO_CANDIDATES:
-        if candidate.exists():
+        parent = candidate.parent
+        if parent not in entries_by_dir:
+            try:
+                with os.scandir(parent) as entries:
+                    entries_by_dir[parent] = {entry.name for entry in entries if entry.is_file()}
+            except OSError:
+                entries_by_dir[parent] = set()
+        if candidate.name in entries_by_dir[parent]:
             return candidate
     return None
 
 
+@st.cache_resource(show_spinner=False)
 def get_logo_data_uri() -> str | None:
     logo_path = get_logo_path()
     if not logo_path:
@@ -2179,393 +2618,409 @@ def get_logo_data_uri() -> str | None:
     return f"data:{mime_type};base64,{encoded}"
 
 
+@st.cache_resource(show_spinner=False)
+def get_logo_src() -> str | None:
+    logo_path = get_logo_path()
+    if not logo_path:
+        return None
+    main_file = getattr(sys.modules.get("__main__"), "__file__", None)
+    if st.get_option("server.enableStaticServing") and main_file:
+        static_logo = Path(main_file).resolve().parent / "static" / logo_path.name
+        try:
+            static_logo.parent.mkdir(exist_ok=True)
+            source_stat = logo_path.stat()
+            copy_stat = static_logo.stat() if static_logo.exists() else None
+            if copy_stat is None or (copy_stat.st_size, copy_stat.st_mtime_ns) != (
+                source_stat.st_size,
+                source_stat.st_mtime_ns,
+            ):
+                # copy2 carries the mtime over, so an unchanged logo is not copied again.
+                shutil.copy2(logo_path, static_logo)
+            return f"app/static/{logo_path.name}"
+        except OSError:
+            pass
+    return get_logo_data_uri()
+
+
 def get_transition_animation(from_page: str | None, to_page: str) -> str:
     if not from_page or from_page == to_page:
         return "fade"
-    from_idx = PAGE_ORDER.get(from_page, 0)
-    to_idx = PAGE_ORDER.get(to_page, 0)
-    if to_idx > from_idx:
-        return "forward"
-    return "backward"
+    return PAGE_TRANSITIONS.get((from_page, to_page), "fade")
 
 
 def navigate_to(page: str) -> None:
     current_page = st.session_state.get("page", "landing")
     st.session_state["pending_transition_animation"] = get_transition_animation(current_page, page)
     st.session_state["page"] = page
-    st.rerun()
 
 
 def report_exception(context: str, exc: Exception) -> None:
     st.error(f"{context}: {exc}")
     if st.session_state.get("debug_mode", False):
         st.exception(exc)
-        st.code(traceback.format_exc(), language="text")
 
 
-def apply_pending_transition() -> None:
-    transition = st.session_state.get("pending_transition_animation")
-    if not transition:
-        return
-    if transition == "forward":
-        anim = "screenWipeLeft 420ms cubic-bezier(0.2, 0.8, 0.2, 1)"
-    elif transition == "backward":
-        anim = "screenWipeRight 420ms cubic-bezier(0.2, 0.8, 0.2, 1)"
-    else:
-        anim = "screenFadeIn 320ms ease-out"
-    st.markdown(
-        f"""
-        <style>
-        @keyframes screenFadeIn {{
-            0% {{ opacity: 0.55; visibility: visible; }}
-            100% {{ opacity: 0; visibility: hidden; }}
-        }}
-        @keyframes screenWipeLeft {{
-            0% {{ transform: translateX(-100%); opacity: 0.95; visibility: visible; }}
-            60% {{ transform: translateX(0%); opacity: 0.95; visibility: visible; }}
-            100% {{ transform: translateX(100%); opacity: 0; visibility: hidden; }}
-        }}
-        @keyframes screenWipeRight {{
-            0% {{ transform: translateX(100%); opacity: 0.95; visibility: visible; }}
-            60% {{ transform: translateX(0%); opacity: 0.95; visibility: visible; }}
-            100% {{ transform: translateX(-100%); opacity: 0; visibility: hidden; }}
-        }}
-        .page-transition-overlay {{
-            position: fixed;
-            inset: 0;
-            z-index: 999999;
-            pointer-events: none;
-            background: linear-gradient(110deg, rgba(84, 57, 223, 0.52), rgba(14, 114, 95, 0.42));
-            animation: {anim} forwards;
-            will-change: transform, opacity;
-        }}
-        </style>
-        <div class="page-transition-overlay"></div>
-        """,
-        unsafe_allow_html=True,
-    )
-    st.session_state["pending_transition_animation"] = None
+TRANSITION_ANIMATIONS = {
+    "forward": "screenWipeLeft 420ms cubic-bezier(0.2, 0.8, 0.2, 1)",
+    "backward": "screenWipeRight 420ms cubic-bezier(0.2, 0.8, 0.2, 1)",
+    "fade": "screenFadeIn 320ms ease-out",
+}
+TRANSITION_CSS = """
+<style>
+@keyframes screenFadeIn {
+    0% { opacity: 0.55; visibility: visible; }
+    100% { opacity: 0; visibility: hidden; }
+}
+@keyframes screenWipeLeft {
+    0% { transform: translateX(-100%); opacity: 0.95; visibility: visible; }
+    60% { transform: translateX(0%); opacity: 0.95; visibility: visible; }
+    100% { transform: translateX(100%); opacity: 0; visibility: hidden; }
+}
+@keyframes screenWipeRight {
+    0% { transform: translateX(100%); opacity: 0.95; visibility: visible; }
+    60% { transform: translateX(0%); opacity: 0.95; visibility: visible; }
+    100% { transform: translateX(-100%); opacity: 0; visibility: hidden; }
+}
+.page-transition-overlay {
+    position: fixed;
+    inset: 0;
+    z-index: 999999;
+    pointer-events: none;
+    background: linear-gradient(110deg, rgba(84, 57, 223, 0.52), rgba(14, 114, 95, 0.42));
+    will-change: transform, opacity;
+}
+</style>
+"""
 
 
-def inject_responsive_css() -> None:
+def apply_pending_transition(transition: str) -> None:
+    st.session_state["pending_transition_animation"] = None
+    anim = TRANSITION_ANIMATIONS.get(transition, TRANSITION_ANIMATIONS["fade"])
     st.markdown(
-        """
-        <style>
-        @media (max-width: 900px) {
-            section.main > div[data-testid="stMainBlockContainer"] {
-                padding-left: 0.75rem !important;
-                padding-right: 0.75rem !important;
-            }
-            div[data-testid="stHorizontalBlock"] {
-                flex-wrap: wrap !important;
-                row-gap: 0.5rem !important;
-            }
-            div[data-testid="column"] {
-                min-width: 100% !important;
-                flex: 1 1 100% !important;
-            }
-            .landing-title {
-                font-size: 38px !important;
-            }
-            .load-logo,
-            .load-logo-fallback {
-                width: 140px !important;
-                height: 140px !important;
-            }
-            .welcome-name {
-                font-size: 40px !important;
-            }
-            .pnl-wrap {
-                overflow-x: auto !important;
-            }
-            .pnl-grid {
-                min-width: 980px !important;
-            }
-        }
-        @media (max-width: 600px) {
-            .landing-title {
-                font-size: 34px !important;
-            }
-            .welcome-name {
-                font-size: 34px !important;
-            }
-            .welcome-sub {
-                font-size: 14px !important;
-            }
-            .auth-title {
-                font-size: 30px !important;
-            }
-            .day-cell, .week-cell {
-                min-height: 80px !important;
-            }
-            button, input, textarea, [data-baseweb="select"] {
-                font-size: 16px !important;
-            }
-        }
-        </style>
-        """,
+        f'<div class="page-transition-overlay" style="animation: {anim} forwards;"></div>',
         unsafe_allow_html=True,
     )
 
 
+RESPONSIVE_CSS = """
+<style>
+@media (max-width: 900px) {
+    section.main > div[data-testid="stMainBlockContainer"] {
+        padding-left: 0.75rem !important;
+        padding-right: 0.75rem !important;
+    }
+    div[data-testid="stHorizontalBlock"] {
+        flex-wrap: wrap !important;
+        row-gap: 0.5rem !important;
+    }
+    div[data-testid="column"] {
+        min-width: 100% !important;
+        flex: 1 1 100% !important;
+    }
+    .landing-title {
+        font-size: 38px !important;
+    }
+    .load-logo,
+    .load-logo-fallback {
+        width: 140px !important;
+        height: 140px !important;
+    }
+    .welcome-name {
+        font-size: 40px !important;
+    }
+    .pnl-wrap {
+        overflow-x: auto !important;
+    }
+    .pnl-grid {
+        min-width: 980px !important;
+    }
+}
+@media (max-width: 600px) {
+    .landing-title {
+        font-size: 34px !important;
+    }
+    .welcome-name {
+        font-size: 34px !important;
+    }
+    .welcome-sub {
+        font-size: 14px !important;
+    }
+    .auth-title {
+        font-size: 30px !important;
+    }
+    .day-cell, .week-cell {
+        min-height: 80px !important;
+    }
+    button, input, textarea, [data-baseweb="select"] {
+        font-size: 16px !important;
+    }
+}
+</style>
+"""
+
+
+def inject_app_css() -> None:
+    st.markdown(RESPONSIVE_CSS + TRANSITION_CSS, unsafe_allow_html=True)
+
+
+WELCOME_CSS = """
+<style>
+.welcome-fullscreen {
+    position: fixed;
+    inset: 0;
+    z-index: 999998;
+    background:
+        radial-gradient(circle at 20% 20%, rgba(95, 68, 249, 0.28), transparent 32%),
+        radial-gradient(circle at 80% 20%, rgba(19, 153, 117, 0.22), transparent 30%),
+        linear-gradient(160deg, #070b15 0%, #0b1320 55%, #080d17 100%);
+    display: flex;
+    align-items: center;
+    justify-content: center;
+    animation: welcomeBg 1.6s ease-out forwards;
+}
+.welcome-content {
+    text-align: center;
+    color: #f7fbff;
+    transform: translateY(10px) scale(0.96);
+    animation: welcomeText 1.6s cubic-bezier(0.2, 0.8, 0.2, 1) forwards;
+}
+.welcome-label {
+    font-size: 14px;
+    color: #9db6df;
+    letter-spacing: 2px;
+    margin-bottom: 10px;
+}
+.welcome-name {
+    font-size: 58px;
+    font-weight: 900;
+    line-height: 1;
+    text-shadow: 0 8px 25px rgba(20, 24, 40, 0.45);
+}
+.welcome-sub {
+    margin-top: 10px;
+    font-size: 16px;
+    color: #bfd2ef;
+}
+@keyframes welcomeText {
+    0% { opacity: 0; transform: translateY(14px) scale(0.96); }
+    25% { opacity: 1; transform: translateY(0) scale(1); }
+    80% { opacity: 1; transform: translateY(0) scale(1); }
+    100% { opacity: 0; transform: translateY(-10px) scale(1.02); }
+}
+@keyframes welcomeBg {
+    0% { opacity: 0; }
+    15% { opacity: 1; }
+    88% { opacity: 1; }
+    100% { opacity: 0; visibility: hidden; }
+}
+</style>
+"""
+WELCOME_TEMPLATE = string.Template(
+    '<div class="welcome-fullscreen"><div class="welcome-content">'
+    '<div class="welcome-label">WELCOME</div>'
+    '<div class="welcome-name">$username</div>'
+    '<div class="welcome-sub">Your trading journal is ready.</div>'
+    "</div></div>"
+)
+
+
 def render_fullscreen_welcome(username: str) -> None:
-    st.markdown(
-        f"""
-        <style>
-        .welcome-fullscreen {{
-            position: fixed;
-            inset: 0;
-            z-index: 999998;
-            background:
-                radial-gradient(circle at 20% 20%, rgba(95, 68, 249, 0.28), transparent 32%),
-                radial-gradient(circle at 80% 20%, rgba(19, 153, 117, 0.22), transparent 30%),
-                linear-gradient(160deg, #070b15 0%, #0b1320 55%, #080d17 100%);
-            display: flex;
-            align-items: center;
-            justify-content: center;
-            animation: welcomeBg 1.6s ease-out forwards;
-        }}
-        .welcome-content {{
-            text-align: center;
-            color: #f7fbff;
-            transform: translateY(10px) scale(0.96);
-            animation: welcomeText 1.6s cubic-bezier(0.2, 0.8, 0.2, 1) forwards;
-        }}
-        .welcome-label {{
-            font-size: 14px;
-            color: #9db6df;
-            letter-spacing: 2px;
-            margin-bottom: 10px;
-        }}
-        .welcome-name {{
-            font-size: 58px;
-            font-weight: 900;
-            line-height: 1;
-            text-shadow: 0 8px 25px rgba(20, 24, 40, 0.45);
-        }}
-        .welcome-sub {{
-            margin-top: 10px;
-            font-size: 16px;
-            color: #bfd2ef;
-        }}
-        @keyframes welcomeText {{
-            0% {{ opacity: 0; transform: translateY(14px) scale(0.96); }}
-            25% {{ opacity: 1; transform: translateY(0) scale(1); }}
-            80% {{ opacity: 1; transform: translateY(0) scale(1); }}
-            100% {{ opacity: 0; transform: translateY(-10px) scale(1.02); }}
-        }}
-        @keyframes welcomeBg {{
-            0% {{ opacity: 0; }}
-            15% {{ opacity: 1; }}
-            88% {{ opacity: 1; }}
-            100% {{ opacity: 0; }}
-        }}
-        </style>
-        <div class="welcome-fullscreen">
-            <div class="welcome-content">
-                <div class="welcome-label">WELCOME</div>
-                <div class="welcome-name">{username}</div>
-                <div class="welcome-sub">Your trading journal is ready.</div>
-            </div>
-        </div>
-        """,
-        unsafe_allow_html=True,
-    )
-    time.sleep(1.6)
+    st.markdown(WELCOME_CSS + WELCOME_TEMPLATE.substitute(username=username), unsafe_allow_html=True)
     st.session_state["show_welcome_once"] = False
-    st.rerun()
+
+
+LOADING_CSS = """
+<style>
+.load-wrap {
+    position: fixed;
+    inset: 0;
+    z-index: 999998;
+    background: linear-gradient(160deg, #070b15 0%, #0b1320 55%, #080d17 100%);
+    display: flex;
+    flex-direction: column;
+    justify-content: center;
+    align-items: center;
+    text-align: center;
+    animation: fadeIn 0.7s ease-out, loadOut 0.4s ease-in 1.6s forwards;
+}
+.load-logo {
+    width: 180px;
+    height: 180px;
+    object-fit: cover;
+    border-radius: 20px;
+    border: 2px solid #3a4256;
+    box-shadow: 0 14px 35px rgba(0, 0, 0, 0.45);
+    animation: floatPulse 1.8s ease-in-out infinite;
+}
+.load-logo-fallback {
+    width: 180px;
+    height: 180px;
+    border-radius: 20px;
+    border: 2px solid #3a4256;
+    display: flex;
+    align-items: center;
+    justify-content: center;
+    font-weight: 800;
+    color: #dce4ff;
+    background: #1a2030;
+    animation: floatPulse 1.8s ease-in-out infinite;
+}
+.load-title {
+    margin-top: 16px;
+    color: #f6f8ff;
+    font-size: 28px;
+    font-weight: 800;
+    letter-spacing: 0.3px;
+}
+.load-sub {
+    color: #9ca8bc;
+    font-size: 14px;
+    margin-top: 6px;
+    margin-bottom: 18px;
+}
+.load-line {
+    width: min(360px, 88vw);
+    height: 8px;
+    border-radius: 999px;
+    overflow: hidden;
+    background: #212838;
+    border: 1px solid #31394b;
+}
+.load-line::before {
+    content: "";
+    display: block;
+    height: 100%;
+    width: 40%;
+    border-radius: 999px;
+    background: linear-gradient(90deg, #5a3de6, #8c65ff);
+    animation: slideLine 1.2s ease-in-out infinite;
+}
+@keyframes floatPulse {
+    0% { transform: translateY(0) scale(1); }
+    50% { transform: translateY(-8px) scale(1.03); }
+    100% { transform: translateY(0) scale(1); }
+}
+@keyframes slideLine {
+    0% { transform: translateX(-120%); }
+    100% { transform: translateX(320%); }
+}
+@keyframes fadeIn {
+    from { opacity: 0; transform: translateY(8px); }
+    to { opacity: 1; transform: translateY(0); }
+}
+@keyframes loadOut {
+    to { opacity: 0; visibility: hidden; }
+}
+</style>
+"""
+LOADING_TEMPLATE = string.Template(
+    '<div class="load-wrap">$logo_html'
+    '<div class="load-title">Trading Journal</div>'
+    '<div class="load-sub">Loading your workspace...</div>'
+    '<div class="load-line"></div>'
+    "</div>"
+)
 
 
 def render_loading_screen() -> None:
-    logo_data_uri = get_logo_data_uri()
+    logo_src = get_logo_src()
     logo_html = (
-        f'<img src="{logo_data_uri}" alt="Logo" class="load-logo" />'
-        if logo_data_uri
+        f'<img src="{logo_src}" alt="Logo" class="load-logo" />'
+        if logo_src
         else '<div class="load-logo-fallback">LOGO</div>'
     )
 
-    st.markdown(
-        f"""
-        <style>
-        .load-wrap {{
-            min-height: 70vh;
-            display: flex;
-            flex-direction: column;
-            justify-content: center;
-            align-items: center;
-            text-align: center;
-            animation: fadeIn 0.7s ease-out;
-        }}
-        .load-logo {{
-            width: 180px;
-            height: 180px;
-            object-fit: cover;
-            border-radius: 20px;
-            border: 2px solid #3a4256;
-            box-shadow: 0 14px 35px rgba(0, 0, 0, 0.45);
-            animation: floatPulse 1.8s ease-in-out infinite;
-        }}
-        .load-logo-fallback {{
-            width: 180px;
-            height: 180px;
-            border-radius: 20px;
-            border: 2px solid #3a4256;
-            display: flex;
-            align-items: center;
-            justify-content: center;
-            font-weight: 800;
-            color: #dce4ff;
-            background: #1a2030;
-            animation: floatPulse 1.8s ease-in-out infinite;
-        }}
-        .load-title {{
-            margin-top: 16px;
-            color: #f6f8ff;
-            font-size: 28px;
-            font-weight: 800;
-            letter-spacing: 0.3px;
-        }}
-        .load-sub {{
-            color: #9ca8bc;
-            font-size: 14px;
-            margin-top: 6px;
-            margin-bottom: 18px;
-        }}
-        .load-line {{
-            width: min(360px, 88vw);
-            height: 8px;
-            border-radius: 999px;
-            overflow: hidden;
-            background: #212838;
-            border: 1px solid #31394b;
-        }}
-        .load-line::before {{
-            content: "";
-            display: block;
-            height: 100%;
-            width: 40%;
-            border-radius: 999px;
-            background: linear-gradient(90deg, #5a3de6, #8c65ff);
-            animation: slideLine 1.2s ease-in-out infinite;
-        }}
-        @keyframes floatPulse {{
-            0% {{ transform: translateY(0) scale(1); }}
-            50% {{ transform: translateY(-8px) scale(1.03); }}
-            100% {{ transform: translateY(0) scale(1); }}
-        }}
-        @keyframes slideLine {{
-            0% {{ transform: translateX(-120%); }}
-            100% {{ transform: translateX(320%); }}
-        }}
-        @keyframes fadeIn {{
-            from {{ opacity: 0; transform: translateY(8px); }}
-            to {{ opacity: 1; transform: translateY(0); }}
-        }}
-        </style>
-        <div class="load-wrap">
-            {logo_html}
-            <div class="load-title">Trading Journal</div>
-            <div class="load-sub">Loading your workspace...</div>
-            <div class="load-line"></div>
-        </div>
-        """,
-        unsafe_allow_html=True,
-    )
-
-    time.sleep(1.6)
+    st.markdown(LOADING_CSS + LOADING_TEMPLATE.substitute(logo_html=logo_html), unsafe_allow_html=True)
     st.session_state["landing_loaded"] = True
-    st.rerun()
+
+
+LANDING_CSS = """
+<style>
+.landing-logo {
+    display: flex;
+    justify-content: center;
+    margin-top: 10px;
+    margin-bottom: 12px;
+}
+.landing-logo img {
+    width: 190px;
+    border-radius: 20px;
+    border: 2px solid #3a4256;
+    box-shadow: 0 14px 35px rgba(0, 0, 0, 0.35);
+    animation: logoPulse 2.3s ease-in-out infinite;
+}
+.landing-title {
+    font-size: 52px;
+    font-weight: 800;
+    color: #f6f8ff;
+    line-height: 1;
+    margin-top: 4px;
+    margin-bottom: 4px;
+    text-align: center;
+}
+.landing-subtitle {
+    color: #9ca8bc;
+    font-size: 17px;
+    margin-bottom: 16px;
+    text-align: center;
+}
+.landing-chip-row {
+    display: flex;
+    flex-wrap: wrap;
+    gap: 8px;
+    justify-content: center;
+    margin-bottom: 18px;
+}
+.landing-chip {
+    border: 1px solid #2f3648;
+    border-radius: 999px;
+    padding: 6px 12px;
+    color: #b6c2d8;
+    font-size: 12px;
+    background: rgba(16, 20, 31, 0.75);
+}
+.landing-panel {
+    border: 1px solid #2d3342;
+    border-radius: 16px;
+    padding: 22px;
+    background:
+        radial-gradient(circle at 15% 5%, rgba(88, 61, 228, 0.18), transparent 30%),
+        linear-gradient(160deg, #131826 0%, #11141d 55%, #0f1118 100%);
+    animation: fadeUp 0.65s ease-out;
+}
+.stButton button {
+    transition: transform 0.2s ease, box-shadow 0.2s ease;
+    border-radius: 10px;
+}
+.stButton button:hover {
+    transform: translateY(-2px);
+    box-shadow: 0 8px 18px rgba(40, 56, 96, 0.35);
+}
+@keyframes logoPulse {
+    0% { transform: scale(1); }
+    50% { transform: scale(1.04); }
+    100% { transform: scale(1); }
+}
+@keyframes fadeUp {
+    from { opacity: 0; transform: translateY(12px); }
+    to { opacity: 1; transform: translateY(0); }
+}
+</style>
+"""
+LANDING_LOGO_TEMPLATE = string.Template('<div class="landing-logo"><img src="$logo_src" alt="Logo"></div>')
 
 
 def render_landing_page() -> None:
-    st.markdown(
-        """
-        <style>
-        .landing-logo {
-            display: flex;
-            justify-content: center;
-            margin-top: 10px;
-            margin-bottom: 12px;
-        }
-        .landing-logo img {
-            width: 190px;
-            border-radius: 20px;
-            border: 2px solid #3a4256;
-            box-shadow: 0 14px 35px rgba(0, 0, 0, 0.35);
-            animation: logoPulse 2.3s ease-in-out infinite;
-        }
-        .landing-title {
-            font-size: 52px;
-            font-weight: 800;
-            color: #f6f8ff;
-            line-height: 1;
-            margin-top: 4px;
-            margin-bottom: 4px;
-            text-align: center;
-        }
-        .landing-subtitle {
-            color: #9ca8bc;
-            font-size: 17px;
-            margin-bottom: 16px;
-            text-align: center;
-        }
-        .landing-chip-row {
-            display: flex;
-            flex-wrap: wrap;
-            gap: 8px;
-            justify-content: center;
-            margin-bottom: 18px;
-        }
-        .landing-chip {
-            border: 1px solid #2f3648;
-            border-radius: 999px;
-            padding: 6px 12px;
-            color: #b6c2d8;
-            font-size: 12px;
-            background: rgba(16, 20, 31, 0.75);
-        }
-        .landing-panel {
-            border: 1px solid #2d3342;
-            border-radius: 16px;
-            padding: 22px;
-            background:
-                radial-gradient(circle at 15% 5%, rgba(88, 61, 228, 0.18), transparent 30%),
-                linear-gradient(160deg, #131826 0%, #11141d 55%, #0f1118 100%);
-            animation: fadeUp 0.65s ease-out;
-        }
-        .stButton button {
-            transition: transform 0.2s ease, box-shadow 0.2s ease;
-            border-radius: 10px;
-        }
-        .stButton button:hover {
-            transform: translateY(-2px);
-            box-shadow: 0 8px 18px rgba(40, 56, 96, 0.35);
-        }
-        @keyframes logoPulse {
-            0% { transform: scale(1); }
-            50% { transform: scale(1.04); }
-            100% { transform: scale(1); }
-        }
-        @keyframes fadeUp {
-            from { opacity: 0; transform: translateY(12px); }
-            to { opacity: 1; transform: translateY(0); }
-        }
-        </style>
-        """,
-        unsafe_allow_html=True,
-    )
+    st.markdown(LANDING_CSS, unsafe_allow_html=True)
 
     _, center_col, _ = st.columns([1, 1.35, 1])
     with center_col:
         with st.container(border=True):
             logo_path = get_logo_path()
             if logo_path:
-                logo_data_uri = get_logo_data_uri()
-                if logo_data_uri:
-                    st.markdown(
-                        f'<div class="landing-logo"><img src="{logo_data_uri}" alt="Logo"></div>',
-                        unsafe_allow_html=True,
-                    )
+                logo_src = get_logo_src()
+                if logo_src:
+                    st.markdown(LANDING_LOGO_TEMPLATE.substitute(logo_src=logo_src), unsafe_allow_html=True)
             else:
                 st.warning("Logo not found. Add `logo.png` in this folder to use your custom logo.")
 
@@ -2581,60 +3036,58 @@ def render_landing_page() -> None:
                 unsafe_allow_html=True,
             )
             c1, c2 = st.columns(2)
-            if c1.button("Login", use_container_width=True):
-                navigate_to("login")
-            if c2.button("Register", use_container_width=True):
-                navigate_to("register")
+            c1.button("Login", use_container_width=True, on_click=navigate_to, args=("login",))
+            c2.button("Register", use_container_width=True, on_click=navigate_to, args=("register",))
+
+
+LOGIN_CSS = """
+<style>
+.auth-title {
+    font-size: 36px;
+    font-weight: 800;
+    line-height: 1.1;
+    color: #f4f7ff;
+    margin-bottom: 6px;
+    text-align: center;
+}
+.auth-subtitle {
+    font-size: 14px;
+    color: #9ba8bf;
+    text-align: center;
+    margin-bottom: 14px;
+}
+.auth-panel {
+    border: 1px solid #2c3344;
+    border-radius: 18px;
+    padding: 20px;
+    background:
+        radial-gradient(circle at 15% 10%, rgba(96, 67, 255, 0.16), transparent 35%),
+        linear-gradient(160deg, #121827 0%, #0f141f 60%, #0d1119 100%);
+    box-shadow: 0 14px 36px rgba(0, 0, 0, 0.38);
+    animation: authFade 0.45s ease-out;
+}
+div[data-testid="stForm"] {
+    border: 1px solid #2e3546;
+    border-radius: 14px;
+    background: rgba(15, 19, 29, 0.72);
+    padding: 16px 14px 6px 14px;
+}
+.auth-footnote {
+    text-align: center;
+    color: #9ca9c2;
+    font-size: 13px;
+    margin-top: 10px;
+}
+@keyframes authFade {
+    from { opacity: 0; transform: translateY(10px); }
+    to { opacity: 1; transform: translateY(0); }
+}
+</style>
+"""
 
 
 def render_login_page(conn: sqlite3.Connection) -> None:
-    st.markdown(
-        """
-        <style>
-        .auth-title {
-            font-size: 36px;
-            font-weight: 800;
-            line-height: 1.1;
-            color: #f4f7ff;
-            margin-bottom: 6px;
-            text-align: center;
-        }
-        .auth-subtitle {
-            font-size: 14px;
-            color: #9ba8bf;
-            text-align: center;
-            margin-bottom: 14px;
-        }
-        .auth-panel {
-            border: 1px solid #2c3344;
-            border-radius: 18px;
-            padding: 20px;
-            background:
-                radial-gradient(circle at 15% 10%, rgba(96, 67, 255, 0.16), transparent 35%),
-                linear-gradient(160deg, #121827 0%, #0f141f 60%, #0d1119 100%);
-            box-shadow: 0 14px 36px rgba(0, 0, 0, 0.38);
-            animation: authFade 0.45s ease-out;
-        }
-        div[data-testid="stForm"] {
-            border: 1px solid #2e3546;
-            border-radius: 14px;
-            background: rgba(15, 19, 29, 0.72);
-            padding: 16px 14px 6px 14px;
-        }
-        .auth-footnote {
-            text-align: center;
-            color: #9ca9c2;
-            font-size: 13px;
-            margin-top: 10px;
-        }
-        @keyframes authFade {
-            from { opacity: 0; transform: translateY(10px); }
-            to { opacity: 1; transform: translateY(0); }
-        }
-        </style>
-        """,
-        unsafe_allow_html=True,
-    )
+    st.markdown(LOGIN_CSS, unsafe_allow_html=True)
     _, auth_col, _ = st.columns([1, 1.25, 1])
     with auth_col:
         with st.container(border=True):
@@ -2662,59 +3115,58 @@ def render_login_page(conn: sqlite3.Connection) -> None:
                                 del st.query_params["rt"]
                         st.success(msg)
                         navigate_to("app")
+                        st.rerun()
                     else:
                         st.error(msg)
 
             b1, b2 = st.columns(2)
-            if b1.button("Back to Home", use_container_width=True):
-                navigate_to("landing")
-            if b2.button("Go to Register", use_container_width=True):
-                navigate_to("register")
+            b1.button("Back to Home", use_container_width=True, on_click=navigate_to, args=("landing",))
+            b2.button("Go to Register", use_container_width=True, on_click=navigate_to, args=("register",))
             st.markdown('<div class="auth-footnote">Secure local login for your shared app.</div>', unsafe_allow_html=True)
 
 
+REGISTER_CSS = """
+<style>
+.auth-panel-register {
+    border: 1px solid #2c3344;
+    border-radius: 18px;
+    padding: 20px;
+    background:
+        radial-gradient(circle at 85% 10%, rgba(28, 156, 110, 0.14), transparent 35%),
+        linear-gradient(160deg, #121827 0%, #0f141f 60%, #0d1119 100%);
+    box-shadow: 0 14px 36px rgba(0, 0, 0, 0.38);
+    animation: authFade 0.45s ease-out;
+}
+.auth-title {
+    font-size: 36px;
+    font-weight: 800;
+    line-height: 1.1;
+    color: #f4f7ff;
+    margin-bottom: 4px;
+    text-align: center;
+}
+.auth-subtitle {
+    font-size: 14px;
+    color: #9ba8bf;
+    text-align: center;
+    margin-bottom: 16px;
+}
+div[data-testid="stForm"] {
+    border: 1px solid #2e3546;
+    border-radius: 14px;
+    background: rgba(15, 19, 29, 0.72);
+    padding: 16px 14px 6px 14px;
+}
+@keyframes authFade {
+    from { opacity: 0; transform: translateY(10px); }
+    to { opacity: 1; transform: translateY(0); }
+}
+</style>
+"""
+
+
 def render_register_page(conn: sqlite3.Connection) -> None:
-    st.markdown(
-        """
-        <style>
-        .auth-panel-register {
-            border: 1px solid #2c3344;
-            border-radius: 18px;
-            padding: 20px;
-            background:
-                radial-gradient(circle at 85% 10%, rgba(28, 156, 110, 0.14), transparent 35%),
-                linear-gradient(160deg, #121827 0%, #0f141f 60%, #0d1119 100%);
-            box-shadow: 0 14px 36px rgba(0, 0, 0, 0.38);
-            animation: authFade 0.45s ease-out;
-        }
-        .auth-title {
-            font-size: 36px;
-            font-weight: 800;
-            line-height: 1.1;
-            color: #f4f7ff;
-            margin-bottom: 4px;
-            text-align: center;
-        }
-        .auth-subtitle {
-            font-size: 14px;
-            color: #9ba8bf;
-            text-align: center;
-            margin-bottom: 16px;
-        }
-        div[data-testid="stForm"] {
-            border: 1px solid #2e3546;
-            border-radius: 14px;
-            background: rgba(15, 19, 29, 0.72);
-            padding: 16px 14px 6px 14px;
-        }
-        @keyframes authFade {
-            from { opacity: 0; transform: translateY(10px); }
-            to { opacity: 1; transform: translateY(0); }
-        }
-        </style>
-        """,
-        unsafe_allow_html=True,
-    )
+    st.markdown(REGISTER_CSS, unsafe_allow_html=True)
     _, auth_col, _ = st.columns([1, 1.25, 1])
     with auth_col:
         with st.container(border=True):
@@ -2735,81 +3187,90 @@ def render_register_page(conn: sqlite3.Connection) -> None:
                         if ok:
                             st.success(msg)
                             navigate_to("login")
+                            st.rerun()
                         else:
                             st.error(msg)
 
             b1, b2 = st.columns(2)
-            if b1.button("Back to Home", use_container_width=True):
-                navigate_to("landing")
-            if b2.button("Go to Login", use_container_width=True):
-                navigate_to("login")
+            b1.button("Back to Home", use_container_width=True, on_click=navigate_to, args=("landing",))
+            b2.button("Go to Login", use_container_width=True, on_click=navigate_to, args=("login",))
+
+
+WELCOME_BANNER_CSS = """
+<style>
+.welcome-banner {
+    border: 1px solid #2f6a4b;
+    background: linear-gradient(90deg, rgba(24, 88, 58, 0.9), rgba(20, 66, 46, 0.9));
+    color: #e8fff2;
+    border-radius: 10px;
+    padding: 10px 14px;
+    font-weight: 700;
+    margin-bottom: 10px;
+    animation: welcomePop 420ms ease-out;
+}
+@keyframes welcomePop {
+    0% { opacity: 0; transform: translateY(-8px) scale(0.98); }
+    100% { opacity: 1; transform: translateY(0) scale(1); }
+}
+</style>
+"""
+WELCOME_BANNER_TEMPLATE = string.Template('<div class="welcome-banner">Welcome $username</div>')
+
+
+@st.fragment
+def render_calendar_tab(trades_df: pd.DataFrame) -> None:
+    current = date.today()
+    c_month, c_year = st.columns(2)
+    month = c_month.selectbox(
+        "Month",
+        options=list(range(1, 13)),
+        index=current.month - 1,
+        format_func=lambda x: calendar.month_name[x],
+    )
+    year = c_year.number_input("Year", min_value=2000, max_value=2100, value=current.year, step=1)
+    render_pnl_calendar(trades_df, month=int(month), year=int(year))
+
+    if not trades_df.empty:
+        month_df = trades_df[trades_df["trade_year_month"].to_numpy() == int(year) * 100 + int(month)]
+        if not month_df.empty:
+            by_symbol = month_df.groupby("symbol", as_index=False, observed=True)["net_pnl"].sum().sort_values(
+                "net_pnl", ascending=False
+            )
+            st.subheader("Monthly P&L by Symbol")
+            st.bar_chart(by_symbol, x="symbol", y="net_pnl")
 
 
 def render_dashboard(conn: sqlite3.Connection, user_id: int) -> None:
-    saved_theme = get_user_theme(conn, user_id)
-    if st.session_state.get("theme_editor_user_id") != user_id:
-        st.session_state["theme_editor_user_id"] = user_id
-        st.session_state["theme_name"] = saved_theme["theme_name"]
-        st.session_state["theme_bg_color"] = saved_theme["bg_color"]
-        st.session_state["theme_surface_color"] = saved_theme["surface_color"]
-        st.session_state["theme_text_color"] = saved_theme["text_color"]
-        st.session_state["theme_accent_color"] = saved_theme["accent_color"]
-        st.session_state["theme_last_preset"] = saved_theme["theme_name"]
-
-    if st.session_state.get("theme_reset_requested"):
-        base = THEME_PRESETS["Midnight"]
-        st.session_state["theme_name"] = "Midnight"
-        st.session_state["theme_bg_color"] = base["bg_color"]
-        st.session_state["theme_surface_color"] = base["surface_color"]
-        st.session_state["theme_text_color"] = base["text_color"]
-        st.session_state["theme_accent_color"] = base["accent_color"]
-        st.session_state["theme_preset_select"] = "Midnight"
-        st.session_state["theme_last_preset"] = "Midnight"
-        st.session_state["theme_reset_requested"] = False
-
-    pending_theme = st.session_state.get("theme_profile_pending_load")
+    state = st.session_state
+    if state.get("theme_editor_user_id") != user_id:
+        saved_theme = get_user_theme(conn, user_id)
+        state["theme_editor_user_id"] = user_id
+        state.update({state_key: saved_theme[key] for key, state_key in THEME_STATE_KEYS.items()})
+        state["theme_last_preset"] = saved_theme["theme_name"]
+
+    if state.get("theme_reset_requested"):
+        state.update({state_key: DEFAULT_THEME[key] for key, state_key in THEME_STATE_KEYS.items()})
+        state["theme_preset_select"] = "Midnight"
+        state["theme_last_preset"] = "Midnight"
+        state["theme_reset_requested"] = False
+
+    pending_theme = state.get("theme_profile_pending_load")
     if isinstance(pending_theme, dict):
-        st.session_state["theme_name"] = "Custom"
-        st.session_state["theme_bg_color"] = pending_theme["bg_color"]
-        st.session_state["theme_surface_color"] = pending_theme["surface_color"]
-        st.session_state["theme_text_color"] = pending_theme["text_color"]
-        st.session_state["theme_accent_color"] = pending_theme["accent_color"]
-        st.session_state["theme_preset_select"] = "Custom"
-        st.session_state["theme_last_preset"] = "Custom"
-        st.session_state["theme_profile_pending_load"] = None
-
-    active_theme = {
-        "theme_name": st.session_state.get("theme_name", "Midnight"),
-        "bg_color": st.session_state.get("theme_bg_color", THEME_PRESETS["Midnight"]["bg_color"]),
-        "surface_color": st.session_state.get("theme_surface_color", THEME_PRESETS["Midnight"]["surface_color"]),
-        "text_color": st.session_state.get("theme_text_color", THEME_PRESETS["Midnight"]["text_color"]),
-        "accent_color": st.session_state.get("theme_accent_color", THEME_PRESETS["Midnight"]["accent_color"]),
-    }
+        state.update({state_key: pending_theme[key] for key, state_key in THEME_STATE_KEYS.items()})
+        state["theme_name"] = "Custom"
+        state["theme_preset_select"] = "Custom"
+        state["theme_last_preset"] = "Custom"
+        state["theme_profile_pending_load"] = None
+
+    active_theme = {key: state.get(state_key, DEFAULT_THEME[key]) for key, state_key in THEME_STATE_KEYS.items()}
     apply_user_theme(active_theme)
 
     st.title("Trading Journal")
     st.caption("Track trades, accounts, and daily P&L in one place.")
     if st.session_state.get("show_welcome_once"):
         st.markdown(
-            f"""
-            <style>
-            .welcome-banner {{
-                border: 1px solid #2f6a4b;
-                background: linear-gradient(90deg, rgba(24, 88, 58, 0.9), rgba(20, 66, 46, 0.9));
-                color: #e8fff2;
-                border-radius: 10px;
-                padding: 10px 14px;
-                font-weight: 700;
-                margin-bottom: 10px;
-                animation: welcomePop 420ms ease-out;
-            }}
-            @keyframes welcomePop {{
-                0% {{ opacity: 0; transform: translateY(-8px) scale(0.98); }}
-                100% {{ opacity: 1; transform: translateY(0) scale(1); }}
-            }}
-            </style>
-            <div class="welcome-banner">Welcome {st.session_state.get('auth_username', '')}</div>
-            """,
+            WELCOME_BANNER_CSS
+            + WELCOME_BANNER_TEMPLATE.substitute(username=st.session_state.get("auth_username", "")),
             unsafe_allow_html=True,
         )
         st.session_state["show_welcome_once"] = False
@@ -2830,6 +3291,7 @@ def render_dashboard(conn: sqlite3.Connection, user_id: int) -> None:
                     st.session_state["impersonator_username"] = None
                     st.session_state["show_welcome_once"] = True
                     navigate_to("app")
+                    st.rerun()
                 except Exception as exc:
                     report_exception("Return to admin failed", exc)
         st.toggle("Debug Mode", key="debug_mode")
@@ -2927,12 +3389,11 @@ def render_dashboard(conn: sqlite3.Connection, user_id: int) -> None:
                     st.warning("Choose a saved profile first.")
                 else:
                     try:
-                        loaded = load_user_theme_profile(conn, user_id, selected_profile)
+                        loaded = apply_user_theme_profile(conn, user_id, selected_profile)
                         if not loaded:
                             st.warning("Theme profile not found.")
                         else:
                             st.session_state["theme_profile_pending_load"] = loaded
-                            save_user_theme(conn, user_id, loaded)
                             st.session_state["theme_loaded_notice"] = f"Loaded profile '{selected_profile}'."
                             st.rerun()
                     except Exception as exc:
@@ -2949,30 +3410,69 @@ def render_dashboard(conn: sqlite3.Connection, user_id: int) -> None:
                 if "rt" in st.query_params:
                     del st.query_params["rt"]
                 navigate_to("landing")
+                st.rerun()
             except Exception as exc:
                 report_exception("Logout failed", exc)
 
-    accounts_df = get_accounts(conn, user_id)
-    trades_df = get_trades(conn, user_id)
-    cashflows_df = get_cashflows(conn, user_id)
+    render_dashboard_body(conn, user_id)
+
+
+@st.fragment
+def render_delete_account_section(conn: sqlite3.Connection, user_id: int, accounts_by_name: dict[str, int]) -> None:
+    if st.session_state.get("account_deleted_notice"):
+        st.toast(st.session_state["account_deleted_notice"])
+        st.session_state["account_deleted_notice"] = None
+    st.markdown("Delete account")
+    if not accounts_by_name:
+        st.info("No account to delete.")
+        return
+
+    del_col1, del_col2 = st.columns([2, 1])
+    delete_account_name = del_col1.selectbox(
+        "Select account",
+        options=list(accounts_by_name),
+        key="delete_account_select",
+    )
+    confirm_delete = del_col1.checkbox(
+        "I understand this will delete the account, all trades, and all transfers for it.",
+        value=False,
+    )
+    if del_col2.button("Delete Account", type="primary", use_container_width=True):
+        if not confirm_delete:
+            st.warning("Please confirm deletion first.")
+        elif len(accounts_by_name) <= 1:
+            st.warning("You must keep at least one account.")
+        else:
+            try:
+                account_id = accounts_by_name[delete_account_name]
+                if delete_account(conn, user_id=user_id, account_id=account_id):
+                    st.session_state["account_deleted_notice"] = f"Deleted account '{delete_account_name}'."
+                    st.rerun()
+                st.warning("Account could not be deleted.")
+            except Exception as exc:
+                report_exception("Delete account failed", exc)
+
+
+@st.fragment
+def render_dashboard_body(conn: sqlite3.Connection, user_id: int) -> None:
+    accounts_df = get_accounts_cached(conn, user_id)
+    trades_df = get_trades_cached(conn, user_id)
+    cashflows_df = get_cashflows_cached(conn, user_id)
+    accounts_by_name = dict(zip(accounts_df["name"].tolist(), accounts_df["id"].tolist()))
 
-    account_options = ["All Accounts"] + accounts_df["name"].tolist() if not accounts_df.empty else ["All Accounts"]
+    account_names = list(accounts_by_name)
+    n_accounts = len(account_names)
+    account_options = ["All Accounts", *account_names]
     selected_dashboard_account = st.selectbox(
         "Stats Account Scope",
         options=account_options,
         key="dashboard_stats_account_scope",
     )
 
-    scoped_trades = trades_df
-    scoped_cashflows = cashflows_df
-    if selected_dashboard_account != "All Accounts" and not accounts_df.empty:
-        selected_account_id = int(
-            accounts_df.loc[accounts_df["name"] == selected_dashboard_account, "id"].iloc[0]
-        )
-        scoped_trades = trades_df[trades_df["account_id"] == selected_account_id]
-        scoped_cashflows = cashflows_df[cashflows_df["account_id"] == selected_account_id]
+    scoped_account_id = accounts_by_name.get(selected_dashboard_account)
+    scoped_trades = get_trades_cached(conn, user_id, scoped_account_id)
 
-    m = account_metrics(scoped_trades, scoped_cashflows)
+    m = get_account_metrics_cached(conn, user_id, scoped_account_id)
     p = period_pnl_metrics(scoped_trades)
     c1, c2, c3, c4, c5, c6, c7, c8 = st.columns(8)
     c1.metric("Total Net P&L", f"${m['total_net']:,.2f}")
@@ -3105,14 +3605,14 @@ def render_dashboard(conn: sqlite3.Connection, user_id: int) -> None:
 
     with tab1:
         st.subheader("New Trade")
-        if accounts_df.empty:
+        if n_accounts == 0:
             st.error("Create an account first.")
         else:
             col_a, col_b, col_c = st.columns(3)
             trade_date = col_a.date_input("Date", value=date.today(), key="trade_date_input")
             account_name = col_b.selectbox(
                 "Account",
-                options=accounts_df["name"].tolist(),
+                options=account_names,
                 key="trade_account_select",
             )
             side = col_c.selectbox("Side", options=["Long", "Short"], key="trade_side_select")
@@ -3151,11 +3651,10 @@ def render_dashboard(conn: sqlite3.Connection, user_id: int) -> None:
                 st.session_state["trade_qty_input"] = float(st.session_state.get("trade_qty_prefill") or 0.0)
                 st.session_state["trade_qty_prefill"] = None
 
-            selected_account_id = int(accounts_df.loc[accounts_df["name"] == account_name, "id"].iloc[0])
-            selected_account_trades = trades_df[trades_df["account_id"] == selected_account_id]
-            selected_account_cashflows = cashflows_df[cashflows_df["account_id"] == selected_account_id]
-            selected_account_balance = float(selected_account_trades["net_pnl"].sum()) + float(
-                selected_account_cashflows["amount"].sum()
+            selected_account_id = accounts_by_name[account_name]
+            account_view = get_account_view_cached(conn, user_id)
+            selected_account_balance = float(
+                account_view.loc[account_view["account_id"] == selected_account_id, "est_balance"].sum()
             )
 
             with st.expander("Auto Lot/Risk Calculator", expanded=False):
@@ -3300,7 +3799,7 @@ def render_dashboard(conn: sqlite3.Connection, user_id: int) -> None:
                             user_id=user_id,
                             pasted_image_bytes=st.session_state.get("pending_trade_pasted_image_bytes"),
                         )
-                        account_id = int(accounts_df.loc[accounts_df["name"] == account_name, "id"].iloc[0])
+                        account_id = accounts_by_name[account_name]
                         trade_input = TradeInput(
                             trade_date=str(trade_date),
                             account_id=account_id,
@@ -3334,24 +3833,22 @@ def render_dashboard(conn: sqlite3.Connection, user_id: int) -> None:
             st.info("No trades yet.")
         else:
             f1, f2, f3 = st.columns(3)
-            selected_account = f1.selectbox("Account Filter", options=["All"] + accounts_df["name"].tolist())
+            selected_account = f1.selectbox("Account Filter", options=["All", *account_names])
             selected_symbol = f2.text_input("Symbol Filter", placeholder="Optional symbol")
             selected_tag = f3.text_input("Tag Filter", placeholder="Optional tag")
 
-            filtered = trades_df.copy()
+            filtered = trades_df
             if selected_account != "All":
                 filtered = filtered[filtered["account_name"] == selected_account]
-            if selected_symbol.strip():
-                filtered = filtered[
-                    filtered["symbol"].str.upper().str.contains(selected_symbol.upper().strip(), na=False)
-                ]
-            if selected_tag.strip():
-                filtered = filtered[filtered["tags"].str.contains(selected_tag, case=False, na=False)]
+            symbol_needle = selected_symbol.strip().upper()
+            if symbol_needle:
+                filtered = filtered[filtered["symbol_upper"].str.contains(symbol_needle, regex=False)]
+            tag_needle = selected_tag.strip().lower()
+            if tag_needle:
+                filtered = filtered[filtered["tags_lower"].str.contains(tag_needle, regex=False)]
 
-            filtered_display = filtered.copy()
-            filtered_display["has_image"] = filtered_display["image_path"].fillna("").str.strip().ne("")
             st.dataframe(
-                filtered_display[
+                filtered[
                     [
                         "id",
                         "trade_date",
@@ -3373,22 +3870,17 @@ def render_dashboard(conn: sqlite3.Connection, user_id: int) -> None:
                 hide_index=True,
             )
 
-            image_trades = filtered[filtered["image_path"].fillna("").str.strip() != ""]
+            image_trades = filtered[filtered["has_image"]]
             if not image_trades.empty:
                 st.markdown("Trade image preview")
-                preview_options = [
-                    f"#{int(row['id'])} | {row['trade_date']} | {row['symbol']} | {row['account_name']}"
-                    for _, row in image_trades.iterrows()
-                ]
+                preview_options = trade_option_labels(image_trades)
+                preview_image_paths = dict(zip(preview_options, image_trades["image_path"].tolist()))
                 selected_preview = st.selectbox(
                     "Select trade",
                     options=preview_options,
                     key="trade_image_preview_select",
                 )
-                selected_trade_id = int(selected_preview.split("|")[0].replace("#", "").strip())
-                selected_image_path = image_trades.loc[
-                    image_trades["id"] == selected_trade_id, "image_path"
-                ].iloc[0]
+                selected_image_path = preview_image_paths[selected_preview]
                 resolved_preview_image = resolve_image_path(str(selected_image_path))
                 if selected_image_path and resolved_preview_image.exists():
                     img_col_l, img_col_m, img_col_r = st.columns([1, 2, 1])
@@ -3420,36 +3912,30 @@ def render_dashboard(conn: sqlite3.Connection, user_id: int) -> None:
                         report_exception("Delete trade failed", exc)
 
             if not filtered.empty:
-                chart_df = (
-                    filtered.sort_values("trade_date")
-                    .assign(cumulative_net=lambda x: x["net_pnl"].cumsum())
-                )
-                fig = px.line(
-                    chart_df,
+                st.markdown("Equity Curve (Filtered)")
+                st.line_chart(
+                    build_equity_curve_cached(
+                        filtered, user_id, (selected_account, symbol_needle, tag_needle)
+                    ),
                     x="trade_date",
                     y="cumulative_net",
-                    title="Equity Curve (Filtered)",
-                    markers=True,
                 )
-                st.plotly_chart(fig, use_container_width=True)
 
             st.markdown("Edit trade")
             if not trades_df.empty:
-                edit_options = [
-                    f"#{int(row['id'])} | {row['trade_date']} | {row['symbol']} | {row['account_name']}"
-                    for _, row in trades_df.iterrows()
-                ]
+                edit_options = trade_option_labels(trades_df)
+                edit_positions = {label: position for position, label in enumerate(edit_options)}
                 selected_edit = st.selectbox(
                     "Select trade to edit",
                     options=edit_options,
                     key="edit_trade_select",
                 )
-                edit_trade_id = int(selected_edit.split("|")[0].replace("#", "").strip())
-                edit_row = trades_df[trades_df["id"] == edit_trade_id].iloc[0]
+                edit_row = trades_df.iloc[edit_positions[selected_edit]]
+                edit_trade_id = int(edit_row["id"])
 
                 if st.session_state.get("edit_trade_loaded_id") != edit_trade_id:
                     st.session_state["edit_trade_loaded_id"] = edit_trade_id
-                    st.session_state["edit_trade_date"] = pd.to_datetime(edit_row["trade_date"]).date()
+                    st.session_state["edit_trade_date"] = edit_row["trade_timestamp"].date()
                     st.session_state["edit_trade_account_name"] = edit_row["account_name"]
                     st.session_state["edit_trade_side"] = edit_row["side"]
                     st.session_state["edit_trade_symbol"] = str(edit_row["symbol"])
@@ -3474,7 +3960,7 @@ def render_dashboard(conn: sqlite3.Connection, user_id: int) -> None:
                 edit_date = e1.date_input("Edit Date", key="edit_trade_date")
                 edit_account_name = e2.selectbox(
                     "Edit Account",
-                    options=accounts_df["name"].tolist(),
+                    options=account_names,
                     key="edit_trade_account_name",
                 )
                 edit_side = e3.selectbox("Edit Side", options=["Long", "Short"], key="edit_trade_side")
@@ -3575,9 +4061,7 @@ def render_dashboard(conn: sqlite3.Connection, user_id: int) -> None:
                                 user_id=user_id,
                                 pasted_image_bytes=st.session_state.get("pending_edit_pasted_image_bytes"),
                             )
-                            edit_account_id = int(
-                                accounts_df.loc[accounts_df["name"] == edit_account_name, "id"].iloc[0]
-                            )
+                            edit_account_id = accounts_by_name[edit_account_name]
                             updated = update_trade(
                                 conn=conn,
                                 user_id=user_id,
@@ -3610,7 +4094,7 @@ def render_dashboard(conn: sqlite3.Connection, user_id: int) -> None:
 
         st.markdown("Import Trades (CSV)")
         with st.expander("Upload CSV and import", expanded=False):
-            if accounts_df.empty:
+            if n_accounts == 0:
                 st.info("Create an account first.")
             else:
                 uploaded_csv = st.file_uploader(
@@ -3720,7 +4204,7 @@ def render_dashboard(conn: sqlite3.Connection, user_id: int) -> None:
                         )
                         default_import_account = c12.selectbox(
                             "Default Account",
-                            options=accounts_df["name"].tolist(),
+                            options=account_names,
                             key="import_default_account",
                         )
 
@@ -3757,16 +4241,13 @@ def render_dashboard(conn: sqlite3.Connection, user_id: int) -> None:
                                 st.error("Map Net P&L column or disable manual Net P&L mode.")
                             else:
                                 account_name_to_id = {
-                                    str(row["name"]).strip().lower(): int(row["id"])
-                                    for _, row in accounts_df.iterrows()
+                                    str(name).strip().lower(): account_id
+                                    for name, account_id in accounts_by_name.items()
                                 }
                                 account_id_to_id = {
-                                    str(int(row["id"])): int(row["id"])
-                                    for _, row in accounts_df.iterrows()
+                                    str(account_id): account_id for account_id in accounts_by_name.values()
                                 }
-                                default_account_id = int(
-                                    accounts_df.loc[accounts_df["name"] == default_import_account, "id"].iloc[0]
-                                )
+                                default_account_id = accounts_by_name[default_import_account]
 
                                 existing_signatures = set()
                                 if not trades_df.empty:
@@ -3785,7 +4266,7 @@ def render_dashboard(conn: sqlite3.Connection, user_id: int) -> None:
                                             )
                                         )
 
-                                imported = 0
+                                pending_imports: list[TradeInput] = []
                                 skipped = 0
                                 error_samples: list[str] = []
                                 for i, row in csv_df.iterrows():
@@ -3895,67 +4376,29 @@ def render_dashboard(conn: sqlite3.Connection, user_id: int) -> None:
                                             image_path="",
                                             manual_net_pnl=manual_net_pnl,
                                         )
-                                        save_trade(conn, user_id, trade_input)
+                                        pending_imports.append(trade_input)
                                         existing_signatures.add(signature)
-                                        imported += 1
                                     except Exception as row_exc:
                                         skipped += 1
                                         if len(error_samples) < 5:
                                             error_samples.append(f"row {i + 1}: {row_exc}")
 
-                                st.success(f"Imported {imported} trades. Skipped {skipped}.")
-                                if error_samples:
-                                    st.warning("Import notes: " + " | ".join(error_samples))
-                                st.rerun()
+                                try:
+                                    imported = save_trades_bulk(conn, user_id, pending_imports)
+                                    st.success(f"Imported {imported} trades. Skipped {skipped}.")
+                                    if error_samples:
+                                        st.warning("Import notes: " + " | ".join(error_samples))
+                                    st.rerun()
+                                except Exception as exc:
+                                    report_exception("Import trades failed", exc)
 
     with tab3:
-        current = date.today()
-        c_month, c_year = st.columns(2)
-        month = c_month.selectbox(
-            "Month",
-            options=list(range(1, 13)),
-            index=current.month - 1,
-            format_func=lambda x: calendar.month_name[x],
-        )
-        year = c_year.number_input("Year", min_value=2000, max_value=2100, value=current.year, step=1)
-        render_pnl_calendar(trades_df, month=int(month), year=int(year))
-
-        if not trades_df.empty:
-            month_df = trades_df.copy()
-            month_df["trade_date"] = pd.to_datetime(month_df["trade_date"])
-            month_df = month_df[
-                (month_df["trade_date"].dt.month == int(month)) & (month_df["trade_date"].dt.year == int(year))
-            ]
-            if not month_df.empty:
-                by_symbol = month_df.groupby("symbol", as_index=False)["net_pnl"].sum().sort_values(
-                    "net_pnl", ascending=False
-                )
-                st.subheader("Monthly P&L by Symbol")
-                st.bar_chart(by_symbol, x="symbol", y="net_pnl")
+        render_calendar_tab(trades_df)
 
     with tab4:
         st.subheader("Accounts")
-        if not accounts_df.empty:
-            trade_pnl_by_account = (
-                trades_df.groupby("account_id", as_index=False)["net_pnl"]
-                .sum()
-                .rename(columns={"net_pnl": "trade_net_pnl"})
-            )
-            cash_by_account = (
-                cashflows_df.groupby("account_id", as_index=False)["amount"]
-                .sum()
-                .rename(columns={"amount": "net_transfers"})
-                if not cashflows_df.empty
-                else pd.DataFrame(columns=["account_id", "net_transfers"])
-            )
-            account_view = (
-                accounts_df.rename(columns={"id": "account_id"})
-                .merge(trade_pnl_by_account, on="account_id", how="left")
-                .merge(cash_by_account, on="account_id", how="left")
-            )
-            account_view["trade_net_pnl"] = account_view["trade_net_pnl"].fillna(0.0)
-            account_view["net_transfers"] = account_view["net_transfers"].fillna(0.0)
-            account_view["est_balance"] = account_view["trade_net_pnl"] + account_view["net_transfers"]
+        if n_accounts > 0:
+            account_view = get_account_view_cached(conn, user_id)
             st.dataframe(
                 account_view[
                     [
@@ -4031,14 +4474,14 @@ def render_dashboard(conn: sqlite3.Connection, user_id: int) -> None:
                         st.error("Account name already exists.")
 
         st.markdown("Deposit / Withdrawal")
-        if accounts_df.empty:
+        if n_accounts == 0:
             st.info("Create an account first.")
         else:
             with st.form("cashflow_form", clear_on_submit=True):
                 c1, c2, c3 = st.columns(3)
                 cash_account = c1.selectbox(
                     "Account",
-                    options=accounts_df["name"].tolist(),
+                    options=account_names,
                     key="cash_account_select",
                 )
                 flow_type = c2.selectbox("Type", options=["Deposit", "Withdrawal"])
@@ -4048,9 +4491,7 @@ def render_dashboard(conn: sqlite3.Connection, user_id: int) -> None:
                 cash_submitted = st.form_submit_button("Save Transfer")
                 if cash_submitted:
                     try:
-                        account_id = int(
-                            accounts_df.loc[accounts_df["name"] == cash_account, "id"].iloc[0]
-                        )
+                        account_id = accounts_by_name[cash_account]
                         add_cashflow(
                             conn,
                             user_id=user_id,
@@ -4121,38 +4562,7 @@ def render_dashboard(conn: sqlite3.Connection, user_id: int) -> None:
                     except Exception as exc:
                         report_exception("Cloud restore failed", exc)
 
-        st.markdown("Delete account")
-        if accounts_df.empty:
-            st.info("No account to delete.")
-        else:
-            del_col1, del_col2 = st.columns([2, 1])
-            delete_account_name = del_col1.selectbox(
-                "Select account",
-                options=accounts_df["name"].tolist(),
-                key="delete_account_select",
-            )
-            confirm_delete = del_col1.checkbox(
-                "I understand this will delete the account, all trades, and all transfers for it.",
-                value=False,
-            )
-            if del_col2.button("Delete Account", type="primary", use_container_width=True):
-                if not confirm_delete:
-                    st.warning("Please confirm deletion first.")
-                elif len(accounts_df) <= 1:
-                    st.warning("You must keep at least one account.")
-                else:
-                    try:
-                        account_id = int(
-                            accounts_df.loc[accounts_df["name"] == delete_account_name, "id"].iloc[0]
-                        )
-                        deleted = delete_account(conn, user_id=user_id, account_id=account_id)
-                        if deleted:
-                            st.success(f"Deleted account '{delete_account_name}'.")
-                        else:
-                            st.warning("Account could not be deleted.")
-                        st.rerun()
-                    except Exception as exc:
-                        report_exception("Delete account failed", exc)
+        render_delete_account_section(conn, user_id, accounts_by_name)
 
     with tab5:
         st.subheader("Forex Backtesting")
@@ -4294,94 +4704,88 @@ def render_dashboard(conn: sqlite3.Connection, user_id: int) -> None:
                                 del st.query_params["rt"]
                             st.session_state["show_welcome_once"] = True
                             navigate_to("app")
+                            st.rerun()
+
+
+SESSION_STATE_DEFAULTS = {
+    "page": "landing",
+    "auth_user_id": None,
+    "auth_username": None,
+    "impersonator_user_id": None,
+    "impersonator_username": None,
+    "landing_loaded": False,
+    "pending_trade_pasted_image_bytes": None,
+    "paste_widget_version": 0,
+    "pending_transition_animation": None,
+    "show_welcome_once": False,
+    "remember_token": None,
+    "pending_edit_pasted_image_bytes": None,
+    "edit_paste_widget_version": 0,
+    "edit_trade_loaded_id": None,
+    "debug_mode": DEBUG_DEFAULT,
+    "news_scraper_enabled": NEWS_SCRAPER_DEFAULT,
+    "theme_reset_requested": False,
+    "trade_recent_symbol_version": 0,
+    "trade_symbol_clear_requested": False,
+    "theme_profile_pending_load": None,
+    "theme_loaded_notice": None,
+    "account_deleted_notice": None,
+}
 
 
 def init_session_state() -> None:
-    if "page" not in st.session_state:
-        st.session_state["page"] = "landing"
-    if "auth_user_id" not in st.session_state:
-        st.session_state["auth_user_id"] = None
-    if "auth_username" not in st.session_state:
-        st.session_state["auth_username"] = None
-    if "impersonator_user_id" not in st.session_state:
-        st.session_state["impersonator_user_id"] = None
-    if "impersonator_username" not in st.session_state:
-        st.session_state["impersonator_username"] = None
-    if "landing_loaded" not in st.session_state:
-        st.session_state["landing_loaded"] = False
-    if "pending_trade_pasted_image_bytes" not in st.session_state:
-        st.session_state["pending_trade_pasted_image_bytes"] = None
-    if "paste_widget_version" not in st.session_state:
-        st.session_state["paste_widget_version"] = 0
-    if "pending_transition_animation" not in st.session_state:
-        st.session_state["pending_transition_animation"] = None
-    if "show_welcome_once" not in st.session_state:
-        st.session_state["show_welcome_once"] = False
-    if "remember_token" not in st.session_state:
-        st.session_state["remember_token"] = None
-    if "pending_edit_pasted_image_bytes" not in st.session_state:
-        st.session_state["pending_edit_pasted_image_bytes"] = None
-    if "edit_paste_widget_version" not in st.session_state:
-        st.session_state["edit_paste_widget_version"] = 0
-    if "edit_trade_loaded_id" not in st.session_state:
-        st.session_state["edit_trade_loaded_id"] = None
-    if "debug_mode" not in st.session_state:
-        st.session_state["debug_mode"] = DEBUG_DEFAULT
-    if "news_scraper_enabled" not in st.session_state:
-        st.session_state["news_scraper_enabled"] = NEWS_SCRAPER_DEFAULT
-    if "theme_reset_requested" not in st.session_state:
-        st.session_state["theme_reset_requested"] = False
-    if "trade_recent_symbol_version" not in st.session_state:
-        st.session_state["trade_recent_symbol_version"] = 0
-    if "trade_symbol_clear_requested" not in st.session_state:
-        st.session_state["trade_symbol_clear_requested"] = False
-    if "theme_profile_pending_load" not in st.session_state:
-        st.session_state["theme_profile_pending_load"] = None
-    if "theme_loaded_notice" not in st.session_state:
-        st.session_state["theme_loaded_notice"] = None
+    state = st.session_state
+    for key, value in SESSION_STATE_DEFAULTS.items():
+        state.setdefault(key, value)
+
+
+def render_landing_route(conn: sqlite3.Connection) -> None:
+    if not st.session_state["landing_loaded"]:
+        render_loading_screen()
+    render_landing_page()
+
+
+def render_app_route(conn: sqlite3.Connection) -> None:
+    if st.session_state.get("show_welcome_once"):
+        render_fullscreen_welcome(st.session_state.get("auth_username", "Trader"))
+    render_dashboard(conn, int(st.session_state["auth_user_id"]))
+
+
+PAGE_ROUTES = {
+    "landing": render_landing_route,
+    "login": render_login_page,
+    "register": render_register_page,
+}
 
 
 def main() -> None:
     st.set_page_config(page_title="Trading Journal", page_icon="📈", layout="wide")
     conn = get_conn()
-    init_db(conn)
-    ensure_admin_user(conn)
     init_session_state()
-    inject_responsive_css()
-    apply_pending_transition()
+    inject_app_css()
+    pending_transition = st.session_state["pending_transition_animation"]
+    if pending_transition:
+        apply_pending_transition(pending_transition)
 
-    if not st.session_state["auth_user_id"] and "rt" in st.query_params:
-        raw_token = str(st.query_params.get("rt", "")).strip()
+    if not st.session_state["auth_user_id"]:
+        raw_token = st.query_params.get("rt", "").strip()
         if raw_token:
             ok, user_id, username = authenticate_with_remember_token(conn, raw_token)
             if ok and user_id is not None and username:
-                st.session_state["auth_user_id"] = user_id
-                st.session_state["auth_username"] = username
-                st.session_state["remember_token"] = raw_token
-                st.session_state["page"] = "app"
+                st.session_state.update(
+                    auth_user_id=user_id,
+                    auth_username=username,
+                    remember_token=raw_token,
+                    page="app",
+                )
             else:
-                if "rt" in st.query_params:
-                    del st.query_params["rt"]
+                del st.query_params["rt"]
 
     try:
         if st.session_state["auth_user_id"]:
             st.session_state["page"] = "app"
 
-        page = st.session_state["page"]
-        if page == "landing":
-            if not st.session_state["landing_loaded"]:
-                render_loading_screen()
-            else:
-                render_landing_page()
-        elif page == "login":
-            render_login_page(conn)
-        elif page == "register":
-            render_register_page(conn)
-        else:
-            if st.session_state.get("show_welcome_once"):
-                render_fullscreen_welcome(st.session_state.get("auth_username", "Trader"))
-                return
-            render_dashboard(conn, int(st.session_state["auth_user_id"]))
+        PAGE_ROUTES.get(st.session_state["page"], render_app_route)(conn)
     except Exception as exc:
         report_exception("Unexpected app error", exc)
 